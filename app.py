@@ -4,14 +4,17 @@ F1 Interval Tracker - Main Streamlit Application
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import time
+from typing import cast
 import logging
 
 from config import (
     STREAMLIT_CONFIG, PLOT_HEIGHT, PLOT_TEMPLATE,
     POSITIVE_COLOR, NEGATIVE_COLOR, ZERO_LINE_COLOR,
-    DRIVER_COLORS, LIVE_UPDATE_INTERVAL, SIMULATION_SPEED
+    DRIVER_RGB, LIVE_UPDATE_INTERVAL, REPLAY_UPDATE_INTERVAL, SIMULATION_SPEED,
+    LOG_LEVEL, DRIVERS_CACHE_TTL
 )
 from data_fetcher import F1DataFetcher, SessionRecorder
 from data_processor import IntervalCalculator, RaceAnalyzer
@@ -19,26 +22,105 @@ from session_selector import render_session_selector, SessionSelection
 from fastf1_service import FastF1Service
 from standings_board import render_standings_board
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (a no-op if the root logger already has handlers)
+logging.basicConfig(level=LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+# Static parts of the interval figure, built once at import
+_BASE_LAYOUT = dict(
+    xaxis_title="Lap",
+    yaxis_title="Gap (seconds)",
+    yaxis_tickformat='.3f',
+    height=PLOT_HEIGHT,
+    template=PLOT_TEMPLATE,
+    hovermode='x unified',
+    showlegend=True,
+    uirevision='tracker'
+)
+_ZERO_HLINE_KW = dict(y=0, line_dash="dash", line_color=ZERO_LINE_COLOR, opacity=0.7)
+_LEADER_ANNOTATION_KW = dict(
+    text="↑ Driver 1 ahead<br>↓ Driver 2 ahead",
+    xref="paper", yref="paper",
+    x=1, y=1,
+    showarrow=False,
+    font=dict(size=12),
+    bgcolor="rgba(255,255,255,0.8)",
+    bordercolor="gray",
+    borderwidth=1
+)
+# Leader caption indexed by "driver1 is ahead"
+_AHEAD_FMT = ("🔴 {} ahead", "🟢 {} ahead")
+
 # Page configuration
 st.set_page_config(**STREAMLIT_CONFIG)
 
 # Initialize session state
-if 'fetcher' not in st.session_state:
-    st.session_state.fetcher = F1DataFetcher()
+_DEFAULTS: dict[str, object] = {
+    'is_tracking': False,
+    'interval_history': None,
+    'selected_session': None,
+    'openf1_session_key': None,
+    'driver_numbers': {},
+    'last_update': None,
+    'session_load': 0,
+}
+for _key, _value in _DEFAULTS.items():
+    st.session_state.setdefault(_key, _value)
+
+# Built lazily so reruns don't construct a throwaway calculator
 if 'calculator' not in st.session_state:
     st.session_state.calculator = IntervalCalculator()
-if 'is_tracking' not in st.session_state:
-    st.session_state.is_tracking = False
-if 'interval_history' not in st.session_state:
-    st.session_state.interval_history = pd.DataFrame()
-if 'selected_session' not in st.session_state:
-    st.session_state.selected_session = None
-if 'last_update' not in st.session_state:
-    st.session_state.last_update = None
+
+
+@st.cache_resource
+def _get_fetcher() -> F1DataFetcher:
+    """Process-wide OpenF1 fetcher, sharing one connection pool across users."""
+    return F1DataFetcher()
+
+
+class _NoData(Exception):
+    """An OpenF1 lookup came back empty; raised so st.cache_data skips it."""
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_latest_session() -> dict:
+    """Fetch and cache the most recent OpenF1 session.
+
+    Raises _NoData instead of caching a failed lookup for the whole TTL.
+    """
+    latest = _get_fetcher().get_latest_session()
+    if not latest:
+        raise _NoData("no OpenF1 session")
+    return latest
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_recordings() -> list[str]:
+    """List recordings on disk, rescanning at most once a minute."""
+    return SessionRecorder.list_recordings()
+
+
+@st.cache_data(ttl=DRIVERS_CACHE_TTL, show_spinner=False)
+def _cached_session_drivers(session_key: int) -> dict[str, int]:
+    """Fetch and cache the acronym → driver number map of a session.
+
+    Kept in memory only: the fetcher's HTTP cache already persists /drivers
+    across restarts, and st.cache_data ignores ttl when persisting to disk.
+    Entries expire so a list fetched early in a live session is refreshed.
+    An empty lookup raises _NoData so it isn't kept.
+    """
+    driver_numbers = _get_fetcher().get_driver_numbers(session_key)
+    if not driver_numbers:
+        raise _NoData(f"no drivers for session {session_key}")
+    return driver_numbers
+
+
+def _new_session_loaded():
+    """Count a session load and drop the figure and history of the previous one."""
+    st.session_state.session_load += 1
+    for key in ('fig', 'fig_label', '_hist_label', '_hist_history'):
+        st.session_state.pop(key, None)
+
 
 def _load_fastf1_session(selection: SessionSelection):
     """Load a FastF1 session based on the cascading selector result."""
@@ -73,30 +155,32 @@ def _load_fastf1_session(selection: SessionSelection):
         # Store lap data
         laps = session.laps
         if laps is not None and not laps.empty:
-            # Convert FastF1 lap data to format compatible with IntervalCalculator
-            lap_records = []
-            for _, lap in laps.iterrows():
-                lap_records.append({
-                    "driver_number": int(lap["DriverNumber"]),
-                    "lap_number": int(lap["LapNumber"]),
-                    "date_start": lap["LapStartDate"] if pd.notna(lap.get("LapStartDate")) else lap.get("Time"),
-                    "position": int(lap["Position"]) if pd.notna(lap.get("Position")) else 0,
-                })
-            lap_df = pd.DataFrame(lap_records)
-            lap_df["date_start"] = pd.to_datetime(lap_df["date_start"], utc=True)
+            # Convert FastF1 lap data to format compatible with IntervalCalculator,
+            # column by column rather than row by row
+            lap_df = pd.DataFrame({
+                "driver_number": laps["DriverNumber"].astype(int).to_numpy(),
+                "lap_number": laps["LapNumber"].astype(int).to_numpy(),
+                "date_start": pd.to_datetime(
+                    laps["LapStartDate"].where(laps["LapStartDate"].notna(), laps["Time"]),
+                    utc=True
+                ).array,
+                "position": laps["Position"].fillna(0).astype(int).to_numpy(),
+            })
             st.session_state.calculator = IntervalCalculator()
             st.session_state.calculator.update_lap_data(lap_df)
         else:
             st.session_state.calculator = IntervalCalculator()
 
         # Update session state
-        st.session_state.fetcher.driver_numbers = driver_numbers_map
-        st.session_state.available_drivers = driver_names
+        _new_session_loaded()
+        st.session_state.driver_numbers = driver_numbers_map
+        st.session_state.openf1_session_key = None
+        st.session_state.available_drivers = tuple(driver_names)
         st.session_state.selected_session = f"fastf1_{selection.year}_{selection.round_number}"
         st.session_state.loaded_session_label = (
             f"{selection.year} {selection.event_name} – {selection.session_name}"
         )
-        st.session_state.interval_history = pd.DataFrame()
+        st.session_state.interval_history = None
         st.session_state.is_tracking = False
 
         status.success(
@@ -105,10 +189,325 @@ def _load_fastf1_session(selection: SessionSelection):
         )
 
     except Exception as exc:
-        logger.error(f"Failed to load session: {exc}")
+        logger.error("Failed to load session: %s", exc, exc_info=True)
         status.error(f"❌ Failed to load session: {exc}")
 
 
+def _driver_nums(driver1: str, driver2: str) -> tuple[int, int]:
+    """Resolve the selected drivers' numbers, reusing them while the selection is unchanged."""
+    # Keyed on the load counter: recordings share one selected_session and
+    # can map the same acronyms to other numbers
+    pair = (st.session_state.session_load, driver1, driver2)
+    if st.session_state.get('_last_pair') != pair:
+        driver_numbers = st.session_state.driver_numbers
+        st.session_state.driver_nums = (
+            driver_numbers.get(driver1, 0),
+            driver_numbers.get(driver2, 0),
+        )
+        st.session_state._last_pair = pair
+    return st.session_state.driver_nums
+
+def _other_drivers(drivers: tuple[str, ...], exclude: str) -> tuple[str, ...]:
+    """Driver 2 options: every driver except the one picked as Driver 1.
+
+    Kept in session state: each rerun executes the script as a fresh module,
+    so a module-level cache would start out empty every time.
+    """
+    key = (drivers, exclude)
+    if st.session_state.get('_other_drivers_key') != key:
+        st.session_state._other_drivers = tuple(d for d in drivers if d != exclude)
+        st.session_state._other_drivers_key = key
+    return st.session_state._other_drivers
+
+def _build_base_fig(driver1: str, driver2: str) -> go.Figure:
+    """Build the interval figure once; later updates only replace trace data."""
+    fig = go.Figure()
+    
+    # Draw the gap in driver1's team colour when we know it
+    rgb = DRIVER_RGB.get(driver1)
+    
+    fig.add_trace(go.Scattergl(
+        x=[],
+        y=[],
+        mode='lines+markers',
+        name='Gap',
+        line=dict(width=3, color=f"rgb{rgb}" if rgb else None),
+        marker=dict(size=8, color=[]),
+        hovertemplate='Lap %{x}<br>Gap: %{y:.3f}s<extra></extra>'
+    ))
+    
+    # Configure the plot; uirevision keeps pan/zoom across data updates
+    fig.update_layout(**_BASE_LAYOUT, title=f"Gap: {driver1} vs {driver2}")
+    
+    # Add zero line
+    fig.add_hline(**_ZERO_HLINE_KW)
+    
+    # Add annotations
+    fig.add_annotation(**_LEADER_ANNOTATION_KW)
+    
+    return fig
+
+
+def _update_fig(fig: go.Figure, laps: np.ndarray, intervals: np.ndarray):
+    """Push the interval history into the existing gap trace in place."""
+    trace = fig.data[0]
+    old_colors = trace.marker.color or ()
+    n_old = len(old_colors) if len(old_colors) <= len(intervals) else 0
+    # Old colors only carry over while the plotted points are a prefix of the
+    # new ones; another driver pair or a restart recolors everything
+    if n_old and not (np.array_equal(np.asarray(trace.x[:n_old]), laps[:n_old])
+                      and np.array_equal(np.asarray(trace.y[:n_old]), intervals[:n_old])):
+        n_old = 0
+    
+    trace.x = laps
+    trace.y = intervals
+    
+    # Only color the newly appended points
+    new_colors = np.where(intervals[n_old:] > 0, POSITIVE_COLOR, NEGATIVE_COLOR)
+    trace.marker.color = tuple(old_colors[:n_old]) + tuple(new_colors.tolist())
+
+
+# Column-stored interval buffer used while tracking live/recorded sessions.
+# Laps fit in int16 and gaps in float32; Plotly ships such arrays as typed binary
+_IV_DTYPES = {'lap_number': np.int16, 'interval': np.float32, 'interval_change': np.float32}
+
+
+def _reset_interval_buffer(pair: tuple | None = None):
+    """Start an empty append-only interval buffer for live/recorded tracking."""
+    st.session_state._iv = {col: np.empty(256, dtype=dtype) for col, dtype in _IV_DTYPES.items()}
+    st.session_state._iv_len = 0
+    st.session_state._iv_pair = pair
+
+
+def _append_new_intervals(d1_num: int, d2_num: int) -> bool:
+    """Append laps not yet in the interval buffer; returns True if any were added."""
+    # The buffer caches one driver pair; switching drivers starts over
+    if st.session_state.get('_iv_pair') != (d1_num, d2_num):
+        _reset_interval_buffer((d1_num, d2_num))
+    
+    iv = st.session_state._iv
+    n = st.session_state._iv_len
+    since_lap = int(iv['lap_number'][n - 1]) if n else 0
+    history = st.session_state.calculator.calculate_interval_history_incremental(
+        d1_num, d2_num, since_lap
+    )
+    n_new = len(history)
+    if not n_new:
+        return False
+    
+    # Grow by doubling so appends stay O(1) amortized
+    capacity = len(iv['lap_number'])
+    if n + n_new > capacity:
+        while capacity < n + n_new:
+            capacity *= 2
+        iv = {col: np.resize(arr, capacity) for col, arr in iv.items()}
+        st.session_state._iv = iv
+    
+    for col, arr in iv.items():
+        arr[n:n + n_new] = history[col].to_numpy()
+    st.session_state._iv_len = n + n_new
+    return True
+
+
+def _interval_buffer_df() -> pd.DataFrame:
+    """DataFrame view over the filled part of the interval buffer, without copying."""
+    n = st.session_state._iv_len
+    return pd.DataFrame({col: arr[:n] for col, arr in st.session_state._iv.items()}, copy=False)
+
+
+def _start_replay(recorder: SessionRecorder):
+    """Reset the calculator and start the replay clock at the recording's first sample."""
+    st.session_state.calculator = IntervalCalculator()
+    
+    # Rows without a timestamp can never come due, so they are left out
+    starts: list[pd.Timestamp] = []
+    for key, df, col in (('_replay_positions', recorder.get_position_dataframe(), 'date'),
+                         ('_replay_laps', recorder.get_lap_dataframe(), 'date_start')):
+        if len(df):
+            df = df.dropna(subset=[col]).sort_values(col, kind='mergesort', ignore_index=True)
+        if len(df):
+            starts.append(cast(pd.Timestamp, df[col].iat[0]))
+        st.session_state[key] = df
+    st.session_state._replay_pos_cursor = 0
+    st.session_state._replay_lap_cursor = 0
+    
+    session_start = min(starts) if starts else pd.Timestamp(0, tz='UTC')
+    st.session_state._replay_clock = (
+        time.monotonic(), session_start, st.session_state.get('replay_speed', 1.0)
+    )
+
+
+def _replay_time() -> pd.Timestamp:
+    """Session time the replay has reached; a speed change re-anchors the clock."""
+    wall_start, session_start, speed = st.session_state._replay_clock
+    now = time.monotonic()
+    current = session_start + pd.Timedelta(seconds=(now - wall_start) * speed)
+    
+    requested = st.session_state.get('replay_speed', 1.0)
+    if requested != speed:
+        st.session_state._replay_clock = (now, current, requested)
+    return current
+
+
+def _release_due(frame_key: str, cursor_key: str, date_column: str,
+                 until: pd.Timestamp, update) -> bool:
+    """Feed recorded rows stamped up to the replay time to update; True once all are out."""
+    frame = st.session_state[frame_key]
+    if not len(frame):
+        return True
+    
+    cursor = st.session_state[cursor_key]
+    end = int(frame[date_column].searchsorted(until, side='right'))
+    if end > cursor:
+        update(frame.iloc[cursor:end])
+        st.session_state[cursor_key] = end
+    return end >= len(frame)
+
+
+def _run_historical_once(d1_num: int, d2_num: int, fig: go.Figure):
+    """Load and plot the full interval history of a historical session."""
+    # For historical, load all lap data at once; FastF1 sessions already
+    # filled the calculator when loaded and have no OpenF1 session key
+    session_key = st.session_state.openf1_session_key
+    if session_key is not None:
+        lap_data = _get_fetcher().get_lap_data(session_key, [d1_num, d2_num])
+        st.session_state.calculator.update_lap_data(lap_data)
+    
+    # Plot label: if it matches, the figure already shows this exact history
+    label = (st.session_state.session_load, d1_num, d2_num,
+             len(st.session_state.calculator.lap_data))
+    if label == st.session_state.get('_hist_label'):
+        st.session_state.interval_history = st.session_state._hist_history
+    else:
+        # Calculate full history
+        history = st.session_state.calculator.calculate_interval_history(d1_num, d2_num)
+        st.session_state._hist_label = label
+        st.session_state._hist_history = None
+        
+        # Update plot with full data; no history clears the trace
+        if history.empty:
+            _update_fig(fig, np.empty(0, _IV_DTYPES['lap_number']),
+                        np.empty(0, _IV_DTYPES['interval']))
+        else:
+            st.session_state.interval_history = history
+            st.session_state._hist_history = history
+            _update_fig(fig, history['lap_number'].to_numpy(_IV_DTYPES['lap_number']),
+                        history['interval'].to_numpy(_IV_DTYPES['interval']))
+    
+    # For historical data, stop after loading
+    st.session_state.is_tracking = False
+    st.session_state.last_update = datetime.now()
+
+
+def _tick_live_or_replay(data_source: str, d1_num: int, d2_num: int,
+                         fig: go.Figure, plot_container, stats_placeholders=None):
+    """Run one update of live or recorded tracking."""
+    finished = False
+    if data_source == "Recorded Session" and 'recorder' in st.session_state:
+        # Replay on a clock: each tick releases every batch that is due by
+        # now, so the fragment never sleeps and Stop or a new speed apply
+        # on the next tick
+        if '_replay_clock' not in st.session_state:
+            _start_replay(st.session_state.recorder)
+        
+        until = _replay_time()
+        calculator = st.session_state.calculator
+        positions_done = _release_due('_replay_positions', '_replay_pos_cursor', 'date',
+                                      until, calculator.update_position_data)
+        laps_done = _release_due('_replay_laps', '_replay_lap_cursor', 'date_start',
+                                 until, calculator.update_lap_data)
+        finished = positions_done and laps_done
+    
+    else:  # Live session
+        # Stream live data; OpenF1 laps carry no position, so also pull the
+        # position samples that arrived since the last tick
+        fetcher = _get_fetcher()
+        session_key = st.session_state.openf1_session_key
+        positions = fetcher.get_position_data(
+            session_key, [d1_num, d2_num], min_date=st.session_state.get('_live_pos_since')
+        )
+        if not positions.empty:
+            st.session_state.calculator.update_position_data(positions)
+            latest = pd.to_datetime(positions['date'], format='ISO8601', utc=True).max()
+            st.session_state._live_pos_since = latest.isoformat()
+        lap_data = fetcher.get_lap_data(session_key, [d1_num, d2_num])
+        st.session_state.calculator.update_lap_data(lap_data)
+    
+    # Update plot straight from the buffer columns
+    if _append_new_intervals(d1_num, d2_num):
+        st.session_state.interval_history = _interval_buffer_df()
+    n = st.session_state._iv_len
+    iv = st.session_state._iv
+    
+    # Only re-render when a new lap has been completed
+    latest_lap = int(iv['lap_number'][n - 1]) if n else None
+    if latest_lap != st.session_state.get('_last_lap'):
+        st.session_state._last_lap = latest_lap
+        _update_fig(fig, iv['lap_number'][:n], iv['interval'][:n])
+        plot_container.plotly_chart(fig, use_container_width=True, key="interval_plot")
+        if stats_placeholders is not None:
+            _render_stats(stats_placeholders)
+    
+    if finished:
+        # Recording exhausted, stop and refresh the controls
+        del st.session_state._replay_clock
+        st.session_state.is_tracking = False
+        st.rerun()
+
+
+def _render_stats(placeholders: tuple):
+    """Write the current gap, leader and positions into their placeholders in place."""
+    driver1 = st.session_state.driver1_select
+    driver2 = st.session_state.driver2_select
+    d1_num, d2_num = _driver_nums(driver1, driver2)
+    current_stats = st.session_state.calculator.get_current_interval(d1_num, d2_num)
+    gap_placeholder, leader_placeholder, positions_placeholder = placeholders
+    
+    # Display metrics
+    gap_placeholder.metric(
+        "Current Gap",
+        f"{abs(current_stats['current_interval']):.3f}s" if current_stats['current_interval'] else "---",
+        f"{current_stats['closing_rate']:.3f}s/lap" if current_stats['closing_rate'] else None
+    )
+    
+    # Show who's ahead
+    if current_stats['current_interval']:
+        d1_ahead = bool(current_stats['current_interval'] > 0)
+        leader_placeholder.caption(_AHEAD_FMT[d1_ahead].format((driver2, driver1)[d1_ahead]))
+    else:
+        leader_placeholder.empty()
+    
+    # Show positions
+    positions_placeholder.caption(
+        f"P{current_stats['position_d1']} vs P{current_stats['position_d2']}"
+    )
+
+
+def _tracking_fragment(data_source: str, d1_num: int, d2_num: int,
+                       fig: go.Figure, plot_container, status_placeholder,
+                       stats_placeholders=None):
+    """Run one tracking tick; Streamlit re-runs only this fragment on a timer."""
+    if not st.session_state.is_tracking:
+        return
+    
+    try:
+        _tick_live_or_replay(data_source, d1_num, d2_num, fig, plot_container,
+                             stats_placeholders)
+        
+        # Update last update time
+        st.session_state.last_update = datetime.now()
+        
+    except Exception as e:
+        _stop_tracking_with_error(e, status_placeholder)
+
+
+def _stop_tracking_with_error(error: Exception, status_placeholder):
+    """Stop tracking and surface the error in the status area."""
+    logger.error("Error during tracking: %s", error, exc_info=True)
+    st.session_state.is_tracking = False
+    status_placeholder.error(f"❌ Error: {str(error)}")
+
+
 # Title and description
 st.title("🏎️ F1 Driver Interval Tracker")
 st.markdown("Track real-time intervals between drivers during F1 sessions")
@@ -137,7 +536,11 @@ with st.sidebar:
     elif data_source == "Recorded Session":
         st.subheader("Recorded Sessions")
         
-        recordings = SessionRecorder.list_recordings()
+        # Pick up recordings made since the last scan
+        if st.button("🔄 Refresh", key="refresh_recordings"):
+            _cached_recordings.clear()
+        
+        recordings = _cached_recordings()
         if recordings:
             selected_recording = st.selectbox("Select Recording", recordings)
             
@@ -145,13 +548,17 @@ with st.sidebar:
                 recorder = SessionRecorder(selected_recording)
                 if recorder.load():
                     st.session_state.recorder = recorder
+                    st.session_state.pop('_replay_clock', None)
+                    _new_session_loaded()
                     st.session_state.selected_session = "recorded"
+                    st.session_state.openf1_session_key = None
                     
                     # Extract driver list from recording
                     drivers_dict = recorder.data['metadata'].get('drivers', {})
-                    st.session_state.available_drivers = [
-                        d['name_acronym'] for d in drivers_dict.values()
-                    ]
+                    st.session_state.driver_numbers = {
+                        d['name_acronym']: d['driver_number'] for d in drivers_dict.values()
+                    }
+                    st.session_state.available_drivers = tuple(st.session_state.driver_numbers)
                     
                     st.success("Recording loaded!")
                 else:
@@ -169,24 +576,33 @@ with st.sidebar:
         
         if st.button("🔴 Check Live Session"):
             with st.spinner("Checking for live session..."):
-                latest = st.session_state.fetcher.get_latest_session()
-                if latest:
+                try:
+                    latest = _cached_latest_session()
+                except _NoData:
+                    st.warning("No live session found")
+                else:
                     st.session_state.latest_session = latest
                     st.success(f"Found: {latest.get('session_name', 'Unknown')}")
-                else:
-                    st.warning("No live session found")
         
         if 'latest_session' in st.session_state:
             if st.button("Connect to Live Session", type="primary"):
                 session_key = st.session_state.latest_session['session_key']
-                if st.session_state.fetcher.load_session(session_key):
+                try:
+                    driver_numbers = _cached_session_drivers(session_key)
+                except _NoData:
+                    st.error("Failed to connect to live session")
+                else:
+                    # Keep the cached, pure-data result as per-user state
+                    _new_session_loaded()
+                    st.session_state.openf1_session_key = session_key
+                    st.session_state.driver_numbers = dict(driver_numbers)
                     st.session_state.selected_session = session_key
-                    drivers = st.session_state.fetcher.get_driver_list()
-                    st.session_state.available_drivers = drivers
+                    st.session_state.available_drivers = tuple(driver_numbers)
                     st.success("Connected to live session!")
 
 # Main content area
 col1, col2 = st.columns([1, 3])
+stats_placeholders = None
 
 with col1:
     st.header("🏁 Driver Selection")
@@ -202,7 +618,7 @@ with col1:
             
             driver2 = st.selectbox(
                 "Driver 2",
-                [d for d in st.session_state.available_drivers if d != driver1],
+                _other_drivers(st.session_state.available_drivers, driver1),
                 key="driver2_select"
             )
             
@@ -214,38 +630,24 @@ with col1:
             with col_start:
                 if st.button("▶️ Start", type="primary", disabled=st.session_state.is_tracking):
                     st.session_state.is_tracking = True
-                    st.session_state.interval_history = pd.DataFrame()
+                    st.session_state.interval_history = None
+                    if data_source != "Historical Session":
+                        # Historical figures are reused via their plot label
+                        st.session_state.pop('fig', None)
+                    st.session_state.pop('_replay_clock', None)
+                    st.session_state.pop('_live_pos_since', None)
+                    _reset_interval_buffer()
                     
             with col_stop:
                 if st.button("⏹️ Stop", disabled=not st.session_state.is_tracking):
                     st.session_state.is_tracking = False
             
-            # Display current stats
+            # Display current stats into placeholders the tracking fragment reuses
             st.divider()
-            if st.session_state.is_tracking and not st.session_state.interval_history.empty:
-                # Get driver numbers
-                d1_num = st.session_state.fetcher.driver_numbers.get(driver1, 0)
-                d2_num = st.session_state.fetcher.driver_numbers.get(driver2, 0)
-                
-                # Get current stats
-                current_stats = st.session_state.calculator.get_current_interval(d1_num, d2_num)
-                
-                # Display metrics
-                st.metric(
-                    "Current Gap",
-                    f"{abs(current_stats['current_interval']):.3f}s" if current_stats['current_interval'] else "---",
-                    f"{current_stats['closing_rate']:.3f}s/lap" if current_stats['closing_rate'] else None
-                )
-                
-                # Show who's ahead
-                if current_stats['current_interval']:
-                    if current_stats['current_interval'] > 0:
-                        st.caption(f"🟢 {driver1} ahead")
-                    else:
-                        st.caption(f"🔴 {driver2} ahead")
-                
-                # Show positions
-                st.caption(f"P{current_stats['position_d1']} vs P{current_stats['position_d2']}")
+            if st.session_state.is_tracking:
+                stats_placeholders = (st.empty(), st.empty(), st.empty())
+                if st.session_state.interval_history is not None:
+                    _render_stats(stats_placeholders)
         else:
             st.info("Load a session to see drivers")
     else:
@@ -261,131 +663,48 @@ with col2:
     info_container = st.container()
     
     if st.session_state.selected_session and 'driver1_select' in st.session_state:
-        # Initial empty plot
-        fig = go.Figure()
-        
-        # Configure the plot
-        fig.update_layout(
-            title=f"Gap: {st.session_state.get('driver1_select', 'Driver 1')} vs {st.session_state.get('driver2_select', 'Driver 2')}",
-            xaxis_title="Lap",
-            yaxis_title="Gap (seconds)",
-            height=PLOT_HEIGHT,
-            template=PLOT_TEMPLATE,
-            hovermode='x unified',
-            showlegend=True
-        )
-        
-        # Add zero line
-        fig.add_hline(y=0, line_dash="dash", line_color=ZERO_LINE_COLOR, opacity=0.7)
-        
-        # Add annotations
-        fig.add_annotation(
-            text="↑ Driver 1 ahead<br>↓ Driver 2 ahead",
-            xref="paper", yref="paper",
-            x=1, y=1,
-            showarrow=False,
-            font=dict(size=12),
-            bgcolor="rgba(255,255,255,0.8)",
-            bordercolor="gray",
-            borderwidth=1
-        )
-        
-        plot_container.plotly_chart(fig, use_container_width=True)
+        # Build the figure once per session and driver pair; ticks only swap trace data
+        fig_drivers = (st.session_state.driver1_select, st.session_state.driver2_select)
+        fig_label = (st.session_state.session_load, *fig_drivers)
+        if 'fig' not in st.session_state or st.session_state.get('fig_label') != fig_label:
+            st.session_state.fig = _build_base_fig(*fig_drivers)
+            st.session_state.fig_label = fig_label
+            st.session_state.pop('_hist_label', None)  # the new figure is empty
+        fig = st.session_state.fig
         
         # Run tracking loop
         if st.session_state.is_tracking:
             # Get driver numbers
-            d1_num = st.session_state.fetcher.driver_numbers.get(st.session_state.driver1_select, 0)
-            d2_num = st.session_state.fetcher.driver_numbers.get(st.session_state.driver2_select, 0)
+            d1_num, d2_num = _driver_nums(*fig_drivers)
             
             # Create a placeholder for updates
             with info_container:
                 status_placeholder = st.empty()
                 status_placeholder.info("🔄 Tracking active...")
             
-            # Continuous update loop
-            while st.session_state.is_tracking:
-                try:
-                    # Fetch latest data based on source
-                    if data_source == "Historical Session":
-                        # For historical, load all lap data at once
-                        if st.session_state.interval_history.empty:
-                            lap_data = st.session_state.fetcher.get_lap_data([d1_num, d2_num])
-                            st.session_state.calculator.update_lap_data(lap_data)
-                            
-                            # Calculate full history
-                            history = st.session_state.calculator.calculate_interval_history(d1_num, d2_num)
-                            st.session_state.interval_history = history
-                            
-                            # Update plot with full data
-                            if not history.empty:
-                                fig = go.Figure()
-                                
-                                # Determine colors based on gap
-                                colors = [POSITIVE_COLOR if gap > 0 else NEGATIVE_COLOR 
-                                         for gap in history['interval']]
-                                
-                                fig.add_trace(go.Scatter(
-                                    x=history['lap_number'],
-                                    y=history['interval'],
-                                    mode='lines+markers',
-                                    name='Gap',
-                                    line=dict(width=3),
-                                    marker=dict(size=8, color=colors),
-                                    hovertemplate='Lap %{x}<br>Gap: %{y:.3f}s<extra></extra>'
-                                ))
-                                
-                                # Update layout
-                                fig.update_layout(
-                                    title=f"Gap: {st.session_state.driver1_select} vs {st.session_state.driver2_select}",
-                                    xaxis_title="Lap",
-                                    yaxis_title="Gap (seconds)",
-                                    height=PLOT_HEIGHT,
-                                    template=PLOT_TEMPLATE,
-                                    hovermode='x unified'
-                                )
-                                
-                                # Add zero line
-                                fig.add_hline(y=0, line_dash="dash", line_color=ZERO_LINE_COLOR, opacity=0.7)
-                                
-                                plot_container.plotly_chart(fig, use_container_width=True)
-                                
-                            # For historical data, stop after loading
-                            st.session_state.is_tracking = False
-                            status_placeholder.success("✅ Data loaded!")
-                    
-                    elif data_source == "Recorded Session" and 'recorder' in st.session_state:
-                        # Replay recorded data
-                        for position_batch in st.session_state.recorder.replay_positions(
-                            speed=st.session_state.get('replay_speed', 1.0)
-                        ):
-                            if not st.session_state.is_tracking:
-                                break
-                                
-                            # Update with batch data
-                            st.session_state.calculator.update_position_data(position_batch)
-                            
-                            # Update plot
-                            # ... (similar plotting logic)
-                            
-                            time.sleep(0.1)  # Small delay for UI updates
-                    
-                    else:  # Live session
-                        # Stream live data
-                        # ... (implement live streaming)
-                        time.sleep(LIVE_UPDATE_INTERVAL)
-                    
-                    # Update last update time
-                    st.session_state.last_update = datetime.now()
-                    
-                except Exception as e:
-                    logger.error(f"Error during tracking: {e}")
-                    st.session_state.is_tracking = False
-                    status_placeholder.error(f"❌ Error: {str(e)}")
-                    break
-                
-                # Allow Streamlit to update
-                time.sleep(0.1)
+            if data_source == "Historical Session":
+                # Historical data is a one-shot load, no update loop needed
+                if st.session_state.is_tracking and st.session_state.interval_history is None:
+                    try:
+                        _run_historical_once(d1_num, d2_num, fig)
+                        status_placeholder.success("✅ Data loaded!")
+                    except Exception as e:
+                        _stop_tracking_with_error(e, status_placeholder)
+            else:
+                # Re-run only the tracking fragment on a timer instead of blocking in a loop
+                run_every = (
+                    LIVE_UPDATE_INTERVAL if data_source == "Live Session" else REPLAY_UPDATE_INTERVAL
+                )
+                # A full rerun recreates plot_container, so force the first tick to draw
+                st.session_state._last_lap = -1
+                st.fragment(_tracking_fragment, run_every=run_every)(
+                    data_source, d1_num, d2_num, fig, plot_container, status_placeholder,
+                    stats_placeholders
+                )
+        
+        # The tracking fragment draws the plot itself while it is running
+        if not st.session_state.is_tracking or data_source == "Historical Session":
+            plot_container.plotly_chart(fig, use_container_width=True, key="interval_plot")
     else:
         # No session loaded
         with info_container:
@@ -3,6 +3,7 @@ Configuration settings for F1 Interval Dashboard
 """
 import os
 from pathlib import Path
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,6 +12,7 @@ load_dotenv()
 # Base paths
 BASE_DIR = Path(__file__).parent
 RECORDED_SESSIONS_DIR = BASE_DIR / "recorded_sessions"
+OPENF1_CACHE_PATH = BASE_DIR / "openf1_cache"  # requests-cache appends .sqlite
 
 # Create directories if they don't exist
 RECORDED_SESSIONS_DIR.mkdir(exist_ok=True)
@@ -19,9 +21,13 @@ RECORDED_SESSIONS_DIR.mkdir(exist_ok=True)
 OPENF1_BASE_URL = "https://api.openf1.org/v1"
 API_TIMEOUT = 30  # seconds
 RETRY_ATTEMPTS = 3
+HTTP_POOL_CONNECTIONS = 8  # distinct hosts kept in the pool
+HTTP_POOL_MAXSIZE = 16  # keep-alive connections per host, shared by all users
+DRIVERS_CACHE_TTL = 3600  # seconds; a live session's entry list can fill in late
 
 # Data refresh settings
 LIVE_UPDATE_INTERVAL = 5  # seconds between updates during live sessions
+REPLAY_UPDATE_INTERVAL = 0.25  # seconds between replay ticks; each releases every batch due by then
 SIMULATION_SPEED = 100.0  # Speed multiplier for replay (1.0 = real-time)
 
 # Visualization settings
@@ -32,7 +38,7 @@ NEGATIVE_COLOR = "#FF6347"  # Red for negative intervals
 ZERO_LINE_COLOR = "#808080"  # Gray for zero line
 
 # Driver colors (official F1 2024 colors)
-DRIVER_COLORS = {
+DRIVER_COLORS = MappingProxyType({
     "VER": "#3671C6",  # Red Bull
     "PER": "#3671C6",
     "HAM": "#27F4D2",  # Mercedes
@@ -53,15 +59,25 @@ DRIVER_COLORS = {
     "SAR": "#B6BABD",
     "MAG": "#B6BABD",  # Haas
     "HUL": "#B6BABD",
-}
+})
+
+
+def _hex_to_rgb(hex_color: str) -> tuple:
+    """Convert a '#RRGGBB' string to an (r, g, b) int tuple"""
+    h = hex_color.lstrip('#')
+    return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16))
+
+
+# Parsed once at import; both mappings are read-only across reruns
+DRIVER_RGB = MappingProxyType({k: _hex_to_rgb(v) for k, v in DRIVER_COLORS.items()})
 
 # Session settings
 DEFAULT_SESSION_TYPE = "Race"
 AVAILABLE_SESSION_TYPES = ["Race", "Qualifying", "Practice 3", "Practice 2", "Practice 1"]
 
 # Recording settings
-RECORDING_FORMAT = "json"
-COMPRESSION = False
+PARQUET_COMPRESSION = "zstd"
+COMPRESSION = False  # gzip the JSON metadata file
 
 # Streamlit configuration
 STREAMLIT_CONFIG = {
@@ -2,49 +2,90 @@
 OpenF1 API interface for fetching race data
 """
 import requests
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession, DO_NOT_CACHE
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import numpy as np
+import pyarrow as pa  # type: ignore[import-untyped]
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
 from datetime import datetime
 import json
+import gzip
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Generator
+from typing import Any, Dict, List, Optional, Tuple, Generator, cast
 import logging
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; recordings then use the stdlib json module
+    orjson = None  # type: ignore[assignment]
+
 from config import (
     OPENF1_BASE_URL, API_TIMEOUT, RETRY_ATTEMPTS,
-    RECORDED_SESSIONS_DIR, RECORDING_FORMAT
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, OPENF1_CACHE_PATH, DRIVERS_CACHE_TTL,
+    RECORDED_SESSIONS_DIR, COMPRESSION, PARQUET_COMPRESSION
 )
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class F1DataFetcher:
-    """Interface for fetching data from OpenF1 API"""
+    """
+    Interface for fetching data from OpenF1 API
+
+    Holds no per-session state, so one instance (and its connection pool)
+    can be shared by every user; the session key is passed to each call.
+    """
     
     def __init__(self):
         self.base_url = OPENF1_BASE_URL
-        self.session = requests.Session()
-        self.current_session_key = None
-        self.drivers = {}
-        self.driver_numbers = {}  # Map acronym to number
         
-    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
-        """Make API request with retry logic"""
+        # Entry lists and session listings rarely change, so those are cached
+        # on disk; entry lists still expire, as one fetched early in a live
+        # session can be incomplete. Laps and position always hit the API
+        api_root = self.base_url.split('://', 1)[-1]
+        self.session = CachedSession(
+            str(OPENF1_CACHE_PATH),
+            backend='sqlite',
+            expire_after=DO_NOT_CACHE,
+            urls_expire_after={
+                f"{api_root}/drivers": DRIVERS_CACHE_TTL,
+                f"{api_root}/sessions": 60,
+            },
+            allowable_methods=['GET']
+        )
+        
+        # Size the keep-alive pool for concurrent app sessions in one process;
+        # urllib3 retries failed GETs with exponential backoff
+        retry = Retry(
+            total=RETRY_ATTEMPTS - 1,  # RETRY_ATTEMPTS counts the first try
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET']
+        )
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS,
+                              pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Optional[List[Dict]]:
+        """Make API request; retries happen in the session's HTTPAdapter"""
         url = f"{self.base_url}/{endpoint}"
         
-        for attempt in range(RETRY_ATTEMPTS):
-            try:
-                response = self.session.get(url, params=params, timeout=API_TIMEOUT)
-                response.raise_for_status()
-                return response.json()
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"Request failed (attempt {attempt + 1}/{RETRY_ATTEMPTS}): {e}")
-                if attempt < RETRY_ATTEMPTS - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                else:
-                    logger.error(f"Failed to fetch data from {endpoint}: {e}")
+        try:
+            response = self.session.get(url, params=params, timeout=API_TIMEOUT)
+            response.raise_for_status()
+            # Decode the raw body with orjson when available; the stdlib
+            # fallback matches response.json()
+            if orjson is not None:
+                return orjson.loads(response.content)
+            return response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # ValueError covers a body that isn't valid JSON
+            logger.error(f"Failed to fetch data from {endpoint}: {e}")
         return None
     
     def get_recent_sessions(self, limit: int = 20) -> List[Dict]:
@@ -53,9 +94,14 @@ class F1DataFetcher:
         current_year = datetime.now().year
         all_sessions = []
         
-        # Fetch sessions for current and previous year
-        for year in [current_year, current_year - 1]:
-            data = self._make_request("sessions", {"year": year})
+        # Fetch sessions for current and previous year concurrently;
+        # the pooled session is safe to share between the threads
+        years = [current_year, current_year - 1]
+        with ThreadPoolExecutor(max_workers=len(years)) as executor:
+            results = list(executor.map(
+                lambda year: self._make_request("sessions", {"year": year}), years
+            ))
+        for data in results:
             if data:
                 all_sessions.extend(data)
         
@@ -70,37 +116,23 @@ class F1DataFetcher:
         data = self._make_request("sessions", {"limit": 1})
         return data[0] if data else None
     
-    def load_session(self, session_key: int) -> bool:
-        """Load a specific session and its drivers"""
-        # Verify session exists
-        session_data = self._make_request("sessions", {"session_key": session_key})
-        if not session_data:
-            return False
-            
-        self.current_session_key = session_key
-        self._load_drivers()
-        return True
+    def get_drivers(self, session_key: int) -> Dict[int, Dict]:
+        """Get driver information for a session, keyed by driver number"""
+        data = self._make_request("drivers", {"session_key": session_key})
+        if not data:
+            return {}
+        logger.info(f"Loaded {len(data)} drivers for session {session_key}")
+        return {d['driver_number']: d for d in data}
     
-    def _load_drivers(self):
-        """Load driver information for the current session"""
-        if not self.current_session_key:
-            return
-            
-        data = self._make_request("drivers", {"session_key": self.current_session_key})
-        if data:
-            self.drivers = {d['driver_number']: d for d in data}
-            self.driver_numbers = {d['name_acronym']: d['driver_number'] for d in data}
-            logger.info(f"Loaded {len(self.drivers)} drivers for session {self.current_session_key}")
+    def get_driver_numbers(self, session_key: int) -> Dict[str, int]:
+        """Map driver acronyms to driver numbers for a session"""
+        return {d['name_acronym']: num for num, d in self.get_drivers(session_key).items()}
     
-    def get_driver_list(self) -> List[str]:
-        """Get list of driver acronyms for current session"""
-        return list(self.driver_numbers.keys())
-    
-    def get_position_data(self, driver_numbers: List[int], 
+    def get_position_data(self, session_key: int, driver_numbers: List[int], 
                          min_date: Optional[str] = None) -> pd.DataFrame:
         """Get position data for specified drivers"""
         params = {
-            "session_key": self.current_session_key,
+            "session_key": session_key,
             "driver_number": ",".join(map(str, driver_numbers))
         }
         if min_date:
@@ -108,25 +140,26 @@ class F1DataFetcher:
             
         data = self._make_request("position", params)
         if data:
-            return pd.DataFrame(data)
+            return _records_frame(data)
         return pd.DataFrame()
     
-    def get_lap_data(self, driver_numbers: List[int]) -> pd.DataFrame:
+    def get_lap_data(self, session_key: int, driver_numbers: List[int]) -> pd.DataFrame:
         """Get lap timing data for specified drivers"""
         params = {
-            "session_key": self.current_session_key,
+            "session_key": session_key,
             "driver_number": ",".join(map(str, driver_numbers))
         }
         
         data = self._make_request("laps", params)
         if data:
-            df = pd.DataFrame(data)
+            df = _records_frame(data)
             if not df.empty:
-                df['date_start'] = pd.to_datetime(df['date_start'])
+                # OpenF1 sends RFC 3339 strings; format='ISO8601' takes pandas' fast parser
+                df['date_start'] = pd.to_datetime(df['date_start'], format='ISO8601', utc=True)
             return df
         return pd.DataFrame()
     
-    def stream_live_positions(self, driver_numbers: List[int], 
+    def stream_live_positions(self, session_key: int, driver_numbers: List[int], 
                             interval: float = 5.0) -> Generator[pd.DataFrame, None, None]:
         """Stream live position updates for specified drivers"""
         last_date = None
@@ -134,7 +167,7 @@ class F1DataFetcher:
         while True:
             try:
                 # Get latest positions
-                df = self.get_position_data(driver_numbers, min_date=last_date)
+                df = self.get_position_data(session_key, driver_numbers, min_date=last_date)
                 
                 if not df.empty:
                     # Update last date for next request
@@ -151,13 +184,108 @@ class F1DataFetcher:
                 time.sleep(interval)
 
 
+def _records_frame(records: List[Dict]) -> pd.DataFrame:
+    """Build a frame from API records column-wise in Arrow
+
+    OpenF1 sends every field on every record, so the first record's keys
+    name the columns. Records Arrow can't type consistently fall back to
+    pandas' row-wise constructor.
+    """
+    try:
+        return pa.Table.from_pylist(records).to_pandas()
+    except pa.ArrowException:
+        return pd.DataFrame(records)
+
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _to_builtin(obj):
+    """json/orjson fallback for numpy values the encoder can't write natively"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dump_recording(data: Dict) -> bytes:
+    """Serialize a recording, gzipped if COMPRESSION is enabled"""
+    if orjson is not None:
+        payload = orjson.dumps(data, default=_to_builtin,
+                               option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                               | orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(data, indent=2, default=_to_builtin).encode()
+    if COMPRESSION:
+        payload = gzip.compress(payload, compresslevel=1)
+    return payload
+
+
+def _load_recording(payload: bytes) -> Dict:
+    """Parse a recording written by _dump_recording, compressed or not"""
+    if payload[:2] == _GZIP_MAGIC:
+        payload = gzip.decompress(payload)
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _utc_dates(df: pd.DataFrame, date_columns: Tuple[str, ...]) -> pd.DataFrame:
+    """Copy of a frame with its date columns parsed as UTC datetimes"""
+    return df.assign(**{
+        col: pd.to_datetime(df[col], format='ISO8601', utc=True)
+        for col in date_columns if col in df.columns
+    })
+
+
+def _frame_from_chunks(chunks: List, date_columns: Tuple[str, ...]) -> pd.DataFrame:
+    """Rebuild a frame from the row records of an older JSON recording"""
+    if not chunks:
+        return pd.DataFrame()
+    
+    df = pd.DataFrame(chunks)
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format='ISO8601', utc=True)
+    return df
+
+
 class SessionRecorder:
-    """Record and replay F1 session data for testing"""
+    """Record and replay F1 session data for testing
+    
+    Each stream is appended batch by batch to its own Parquet file, so
+    memory stays flat however long the session runs; save() closes the
+    files and writes a small ``<name>.metadata.json``. Streams can be read
+    back once saved. Single-file JSON recordings still load.
+    """
+    
+    # Date columns normalized to UTC in each stream
+    _POSITION_DATES = ('date',)
+    _LAP_DATES = ('date_start', 'date')
+    # Columns replay_positions feeds to the interval calculator
+    _REPLAY_COLUMNS = ['date', 'driver_number', 'position']
+    # Shortest replay wait worth sleeping for, in seconds
+    _MIN_SLEEP = 0.001
+    # Types for OpenF1 fields that can be all-null in a stream's first batch
+    # (lap_duration on lap 1, say), which Arrow would otherwise type as null
+    # and then reject every later batch; other null fields become float64
+    _NULL_FIELD_TYPES = {
+        'is_pit_out_lap': pa.bool_(),
+        'segments_sector_1': pa.list_(pa.int64()),
+        'segments_sector_2': pa.list_(pa.int64()),
+        'segments_sector_3': pa.list_(pa.int64()),
+        'date_start': pa.timestamp('ns', tz='UTC'),
+        'date': pa.timestamp('ns', tz='UTC'),
+    }
     
     def __init__(self, session_name: str):
         self.session_name = session_name
-        self.filepath = RECORDED_SESSIONS_DIR / f"{session_name}.{RECORDING_FORMAT}"
-        self.data = {
+        self.filepath = RECORDED_SESSIONS_DIR / f"{session_name}.metadata.json"
+        self.pos_path = RECORDED_SESSIONS_DIR / f"{session_name}.positions.parquet"
+        self.lap_path = RECORDED_SESSIONS_DIR / f"{session_name}.laps.parquet"
+        self.legacy_path = RECORDED_SESSIONS_DIR / f"{session_name}.json"
+        self.data: Dict[str, Any] = {
             "metadata": {
                 "session_name": session_name,
                 "recorded_at": datetime.now().isoformat(),
@@ -166,27 +294,41 @@ class SessionRecorder:
             "position_data": [],
             "lap_data": []
         }
+        # Open Parquet writer per stream, created by the stream's first batch
+        self._writers: Dict[Path, pq.ParquetWriter] = {}
+        
+    def _write_batch(self, path: Path, df: pd.DataFrame):
+        """Append a batch to a stream's Parquet file as a new row group"""
+        writer = self._writers.get(path)
+        if writer is None:
+            path.parent.mkdir(exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.cast(self._concrete_schema(table.schema))
+            writer = pq.ParquetWriter(path, table.schema, compression=PARQUET_COMPRESSION)
+            self._writers[path] = writer
+        else:
+            # Later batches are cast to the schema the first one set
+            table = pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False)
+        writer.write_table(table)
+        
+    @classmethod
+    def _concrete_schema(cls, schema: pa.Schema) -> pa.Schema:
+        """Replace null-typed fields so later batches with values still fit"""
+        for i, field in enumerate(schema):
+            if pa.types.is_null(field.type):
+                schema = schema.set(i, field.with_type(
+                    cls._NULL_FIELD_TYPES.get(field.name, pa.float64())))
+        return schema
         
     def add_position_data(self, df: pd.DataFrame):
         """Add position data to recording"""
         if not df.empty:
-            records = df.to_dict('records')
-            for record in records:
-                # Convert datetime objects to strings
-                if 'date' in record and hasattr(record['date'], 'isoformat'):
-                    record['date'] = record['date'].isoformat()
-            self.data["position_data"].extend(records)
+            self._write_batch(self.pos_path, _utc_dates(df, self._POSITION_DATES))
             
     def add_lap_data(self, df: pd.DataFrame):
         """Add lap data to recording"""
         if not df.empty:
-            records = df.to_dict('records')
-            for record in records:
-                # Convert datetime objects to strings
-                for date_field in ['date_start', 'date']:
-                    if date_field in record and hasattr(record[date_field], 'isoformat'):
-                        record[date_field] = record[date_field].isoformat()
-            self.data["lap_data"].extend(records)
+            self._write_batch(self.lap_path, _utc_dates(df, self._LAP_DATES))
     
     def set_drivers(self, drivers: Dict):
         """Set driver information"""
@@ -195,20 +337,37 @@ class SessionRecorder:
     def save(self):
         """Save recorded data to file"""
         self.filepath.parent.mkdir(exist_ok=True)
-        with open(self.filepath, 'w') as f:
-            json.dump(self.data, f, indent=2)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+        
+        # A loaded JSON recording is rewritten in the Parquet layout
+        for chunks, dates, path in (
+            (self.data["position_data"], self._POSITION_DATES, self.pos_path),
+            (self.data["lap_data"], self._LAP_DATES, self.lap_path),
+        ):
+            df = _frame_from_chunks(chunks, dates)
+            if not df.empty:
+                df.to_parquet(path, engine='pyarrow', compression=PARQUET_COMPRESSION, index=False)
+        self.filepath.write_bytes(_dump_recording(self.data["metadata"]))
         logger.info(f"Saved recording to {self.filepath}")
         
     def load(self) -> bool:
         """Load recorded data from file"""
-        if not self.filepath.exists():
-            logger.error(f"Recording file not found: {self.filepath}")
-            return False
-            
         try:
-            with open(self.filepath, 'r') as f:
-                self.data = json.load(f)
-            logger.info(f"Loaded recording from {self.filepath}")
+            if self.filepath.exists():
+                # Streams stay on disk until a dataframe is requested
+                self.data = {
+                    "metadata": _load_recording(self.filepath.read_bytes()),
+                    "position_data": [],
+                    "lap_data": []
+                }
+            elif self.legacy_path.exists():
+                self.data = _load_recording(self.legacy_path.read_bytes())
+            else:
+                logger.error(f"Recording file not found: {self.filepath}")
+                return False
+            logger.info(f"Loaded recording from {self.filepath.parent / self.session_name}")
             return True
         except Exception as e:
             logger.error(f"Error loading recording: {e}")
@@ -217,48 +376,51 @@ class SessionRecorder:
     @classmethod
     def list_recordings(cls) -> List[str]:
         """List available recordings"""
-        recordings = []
-        for file in RECORDED_SESSIONS_DIR.glob(f"*.{RECORDING_FORMAT}"):
-            recordings.append(file.stem)
+        recordings = set()
+        for file in RECORDED_SESSIONS_DIR.glob("*.json"):
+            name = file.name[:-len(".json")]
+            recordings.add(name[:-len(".metadata")] if name.endswith(".metadata") else name)
         return sorted(recordings)
     
-    def get_position_dataframe(self) -> pd.DataFrame:
-        """Get position data as DataFrame"""
-        df = pd.DataFrame(self.data["position_data"])
-        if not df.empty:
-            df['date'] = pd.to_datetime(df['date'])
-        return df
+    def _stream_dataframe(self, chunks: List, dates: Tuple[str, ...], path: Path,
+                          columns: Optional[List[str]]) -> pd.DataFrame:
+        if chunks:
+            df = _frame_from_chunks(chunks, dates)
+            return df if columns is None else df[columns]
+        if path.exists() and path not in self._writers:
+            return pd.read_parquet(path, engine='pyarrow', columns=columns)
+        return pd.DataFrame()
     
-    def get_lap_dataframe(self) -> pd.DataFrame:
-        """Get lap data as DataFrame"""
-        df = pd.DataFrame(self.data["lap_data"])
-        if not df.empty:
-            df['date_start'] = pd.to_datetime(df['date_start'])
-        return df
+    def get_position_dataframe(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Get position data as DataFrame, optionally reading only some columns"""
+        return self._stream_dataframe(self.data["position_data"], self._POSITION_DATES,
+                                      self.pos_path, columns)
+    
+    def get_lap_dataframe(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Get lap data as DataFrame, optionally reading only some columns"""
+        return self._stream_dataframe(self.data["lap_data"], self._LAP_DATES,
+                                      self.lap_path, columns)
     
     def replay_positions(self, speed: float = 1.0) -> Generator[pd.DataFrame, None, None]:
         """Replay recorded position data at specified speed"""
-        df = self.get_position_dataframe()
+        df = self.get_position_dataframe(columns=self._REPLAY_COLUMNS)
         if df.empty:
             return
             
-        # Group by timestamp
-        grouped = df.groupby('date')
-        timestamps = sorted(grouped.groups.keys())
-        
-        if not timestamps:
-            return
-            
-        start_time = timestamps[0]
-        real_start = datetime.now()
+        # Group by timestamp; iterating the groupby slices each batch once,
+        # in timestamp order, instead of a get_group lookup per tick
+        start_ns = df['date'].min().value
+        real_start = time.monotonic()
         
-        for timestamp in timestamps:
-            # Calculate how long to wait
-            elapsed = (timestamp - start_time).total_seconds()
-            target_time = real_start + pd.Timedelta(seconds=elapsed / speed)
-            wait_time = (target_time - datetime.now()).total_seconds()
+        for timestamp, batch in df.groupby('date', sort=True):
+            # Calculate how long to wait on the monotonic clock, so wall-clock
+            # adjustments can't stall or rush the replay
+            elapsed = (cast(pd.Timestamp, timestamp).value - start_ns) * 1e-9
+            wait_time = real_start + elapsed / speed - time.monotonic()
             
-            if wait_time > 0:
+            # Waits shorter than the scheduler can honour are skipped, which
+            # also saves the syscall on fast replays that run behind
+            if wait_time > self._MIN_SLEEP:
                 time.sleep(wait_time)
                 
-            yield grouped.get_group(timestamp)
\ No newline at end of file
+            yield batch
\ No newline at end of file
@@ -4,48 +4,239 @@ Process F1 timing data to calculate intervals between drivers
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Hashable, List, Tuple, Optional
 import logging
 
+try:
+    from numba import njit  # type: ignore[import-not-found]
+except ImportError:  # numba is optional; kernels then run as plain Python
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 logger = logging.getLogger(__name__)
 
+# int64 view of NaT, used to detect missing timestamps inside kernels
+_NAT = np.iinfo(np.int64).min
+
+
+def _to_ns(series: pd.Series) -> np.ndarray:
+    """View a datetime Series as int64 nanoseconds since the epoch"""
+    return series.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+@njit(cache=True)
+def compute_intervals_njit(laps_d1: np.ndarray, start_ns_d1: np.ndarray,
+                           laps_d2: np.ndarray, start_ns_d2: np.ndarray):
+    """
+    Compute the interval between two drivers on every lap they both started.
+
+    Lap numbers must be sorted ascending and lap start times given as int64
+    nanoseconds. Returns the matching row indices into each driver's arrays
+    and the interval in seconds (positive = driver1 ahead).
+    """
+    n1 = laps_d1.shape[0]
+    n2 = laps_d2.shape[0]
+    n = min(n1, n2)
+    idx_d1 = np.empty(n, dtype=np.int64)
+    idx_d2 = np.empty(n, dtype=np.int64)
+    interval = np.empty(n, dtype=np.float64)
+
+    i = 0
+    j = 0
+    k = 0
+    while i < n1 and j < n2:
+        if laps_d1[i] == laps_d2[j]:
+            idx_d1[k] = i
+            idx_d2[k] = j
+            if start_ns_d1[i] == _NAT or start_ns_d2[j] == _NAT:
+                interval[k] = np.nan
+            else:
+                interval[k] = (start_ns_d2[j] - start_ns_d1[i]) * 1e-9
+            i += 1
+            j += 1
+            k += 1
+        elif laps_d1[i] < laps_d2[j]:
+            i += 1
+        else:
+            j += 1
+
+    return idx_d1[:k], idx_d2[:k], interval[:k]
+
+
+@njit(cache=True)
+def detect_pit_stops_njit(start_ns: np.ndarray, avg_lap: float):
+    """
+    Find laps that took more than 30s longer than the average lap.
+
+    Lap start times must be sorted by lap number and given as int64
+    nanoseconds. Lap i's time runs from start i-1 to start i. Returns the
+    row indices of the slow laps and how much longer than avg_lap they took.
+    """
+    n = start_ns.shape[0]
+    idx = np.empty(max(n - 1, 0), dtype=np.int64)
+    duration = np.empty(max(n - 1, 0), dtype=np.float64)
+
+    k = 0
+    for i in range(1, n):
+        if start_ns[i] == _NAT or start_ns[i - 1] == _NAT:
+            continue
+        lap_time = (start_ns[i] - start_ns[i - 1]) * 1e-9
+        if lap_time > avg_lap + 30:
+            idx[k] = i
+            duration[k] = lap_time - avg_lap
+            k += 1
+
+    return idx[:k], duration[:k]
+
+
+@njit(cache=True)
+def average_lap_time_njit(start_ns: np.ndarray) -> float:
+    """
+    Mean lap time in seconds, ignoring laps outside the 60-150s range.
+
+    Lap start times must be sorted by lap number and given as int64
+    nanoseconds; laps with a missing start are skipped. Returns NaN when no
+    lap is in range.
+    """
+    total = 0.0
+    count = 0
+    for i in range(1, start_ns.shape[0]):
+        if start_ns[i] == _NAT or start_ns[i - 1] == _NAT:
+            continue
+        lap_time = (start_ns[i] - start_ns[i - 1]) * 1e-9
+        # Filter out outliers (pit stops, safety car, etc.)
+        if 60 < lap_time < 150:  # Reasonable F1 lap time range
+            total += lap_time
+            count += 1
+
+    return total / count if count else np.nan
+
+
+# Narrow dtypes for the integer key columns; car numbers and positions fit in
+# a byte, lap numbers in two
+_COMPACT_DTYPES = {'driver_number': np.uint8, 'position': np.uint8, 'lap_number': np.uint16}
+
+
+def _compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of a batch with its key columns narrowed to small ints
+
+    Columns holding missing values (float dtype) are left as they are.
+    """
+    narrowed = {
+        col: df[col].astype(dtype) for col, dtype in _COMPACT_DTYPES.items()
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col])
+    }
+    return df.assign(**narrowed) if narrowed else df
+
+
+def _merge_chunks(frame: pd.DataFrame, chunks: List[pd.DataFrame], subset: List[str]) -> pd.DataFrame:
+    """Append pending chunks in a single concat, keeping the latest duplicate"""
+    frames = [frame, *chunks] if len(frame) else chunks
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.drop_duplicates(subset=subset, keep='last')
+
 
 class IntervalCalculator:
     """Calculate time intervals between drivers"""
     
+    # Laps before the first new one that diff/rolling stats need as context
+    _CONTEXT_LAPS = 3
+    # Columns of the frames returned by detect_events
+    _EVENT_COLUMNS = ['lap', 'type', 'duration']
+    # Pending position rows merged into position_data without waiting for a read
+    _FLUSH_ROWS = 50_000
+    
     def __init__(self):
-        self.position_data = pd.DataFrame()
-        self.lap_data = pd.DataFrame()
+        self._position_data = pd.DataFrame()
+        self._lap_data = pd.DataFrame()
+        # Incoming batches wait here until a read needs the merged frame,
+        # so each tick no longer copies everything received so far
+        self._pos_chunks: List[pd.DataFrame] = []
+        self._lap_chunks: List[pd.DataFrame] = []
+        self._pos_pending_rows = 0
+        self._pos_version = 0  # bumped whenever position_data gets new rows
         self.interval_history = []
+        self._lap_version = 0  # bumped whenever lap_data changes
+        self._last_lap_batch: Optional[pd.DataFrame] = None
+        self._events_cache: Dict[int, Tuple[int, pd.DataFrame]] = {}
+        self._avg_lap_cache: Dict[int, Tuple[int, Optional[float]]] = {}
+        self._interval_cache: Dict[Tuple[int, int], Tuple[Tuple[int, int], Dict]] = {}
+        # driver_number -> that driver's laps sorted by lap_number, rebuilt
+        # with one groupby per lap data version instead of a scan per call
+        self._laps_by_driver: Dict[Hashable, pd.DataFrame] = {}
+        self._laps_by_driver_version = -1
+    
+    @property
+    def position_data(self) -> pd.DataFrame:
+        """Position rows received so far, de-duplicated"""
+        if self._pos_chunks:
+            self._flush_positions()
+        return self._position_data
+    
+    @property
+    def lap_data(self) -> pd.DataFrame:
+        """Lap rows received so far, de-duplicated"""
+        if self._lap_chunks:
+            self._lap_data = _merge_chunks(
+                self._lap_data, self._lap_chunks, ['driver_number', 'lap_number'])
+            self._lap_chunks = []
+        return self._lap_data
         
     def update_position_data(self, new_data: pd.DataFrame):
         """Update position data with new information"""
-        if new_data.empty:
+        if len(new_data) == 0:
             return
             
-        # Append new data
-        self.position_data = pd.concat([self.position_data, new_data], ignore_index=True)
-        
-        # Remove duplicates, keeping the latest
-        self.position_data = self.position_data.drop_duplicates(
-            subset=['driver_number', 'date'], 
-            keep='last'
-        )
+        # Ensure datetime format on the incoming batch only; assign() leaves
+        # the caller's frame untouched and avoids rewriting the stored column
+        if 'date' in new_data.columns and not pd.api.types.is_datetime64_any_dtype(new_data['date']):
+            new_data = new_data.assign(date=pd.to_datetime(new_data['date'], format='ISO8601', utc=True))
+            
+        self._pos_chunks.append(_compact(new_data))
+        self._pos_pending_rows += len(new_data)
+        self._pos_version += 1
         
-        # Ensure datetime format
-        if 'date' in self.position_data.columns:
-            self.position_data['date'] = pd.to_datetime(self.position_data['date'])
+        # Positions are only read when lap rows lack them, so merge now
+        # and then to keep the pending list's memory bounded
+        if self._pos_pending_rows >= self._FLUSH_ROWS:
+            self._flush_positions()
+    
+    def _flush_positions(self):
+        self._position_data = _merge_chunks(
+            self._position_data, self._pos_chunks, ['driver_number', 'date'])
+        self._pos_chunks = []
+        self._pos_pending_rows = 0
             
     def update_lap_data(self, new_data: pd.DataFrame):
         """Update lap timing data"""
-        if new_data.empty:
+        if len(new_data) == 0:
+            return
+        
+        # Live polling re-sends the same laps until one completes; an
+        # identical batch changes nothing, so the memoized stats stay valid
+        new_data = _compact(new_data)
+        if self._last_lap_batch is not None and new_data.equals(self._last_lap_batch):
             return
             
-        self.lap_data = pd.concat([self.lap_data, new_data], ignore_index=True)
-        self.lap_data = self.lap_data.drop_duplicates(
-            subset=['driver_number', 'lap_number'], 
-            keep='last'
-        )
+        self._lap_chunks.append(new_data)
+        self._last_lap_batch = new_data
+        self._lap_version += 1
+        
+    def _driver_laps(self, driver_num: int) -> pd.DataFrame:
+        """Laps of one driver, sorted by lap number"""
+        if self._laps_by_driver_version != self._lap_version:
+            lap_data = self.lap_data
+            self._laps_by_driver = {
+                drv: laps.sort_values('lap_number')
+                for drv, laps in lap_data.groupby('driver_number', sort=False)
+            } if len(lap_data) else {}
+            self._laps_by_driver_version = self._lap_version
+            
+        laps = self._laps_by_driver.get(driver_num)
+        return laps if laps is not None else self.lap_data.iloc[:0]
         
     def calculate_interval_at_line(self, driver1_num: int, driver2_num: int, 
                                   lap: Optional[int] = None) -> Optional[float]:
@@ -53,27 +244,29 @@ class IntervalCalculator:
         Calculate interval between two drivers at start/finish line
         Returns positive if driver1 is ahead, negative if driver2 is ahead
         """
-        if self.lap_data.empty:
+        # Get latest lap data for each driver, bailing out before any
+        # filtering when either has none
+        driver1_data = self._driver_laps(driver1_num)
+        driver2_data = self._driver_laps(driver2_num)
+        if len(driver1_data) == 0 or len(driver2_data) == 0:
             return None
-            
+        
         # Filter for specific lap if provided
-        lap_data = self.lap_data
         if lap is not None:
-            lap_data = lap_data[lap_data['lap_number'] == lap]
-            
-        # Get latest lap data for each driver
-        driver1_data = lap_data[lap_data['driver_number'] == driver1_num]
-        driver2_data = lap_data[lap_data['driver_number'] == driver2_num]
+            driver1_data = driver1_data[driver1_data['lap_number'] == lap]
+            driver2_data = driver2_data[driver2_data['lap_number'] == lap]
         
-        if driver1_data.empty or driver2_data.empty:
+        if len(driver1_data) == 0 or len(driver2_data) == 0:
             return None
             
-        # Get the most recent lap crossing for each driver
-        latest_d1 = driver1_data.loc[driver1_data['date_start'].idxmax()]
-        latest_d2 = driver2_data.loc[driver2_data['date_start'].idxmax()]
+        # Get the most recent lap crossing for each driver; the per-driver laps
+        # are sorted by lap number, which tracks time, so it's the last row
+        latest_d1 = driver1_data.iloc[-1]
+        latest_d2 = driver2_data.iloc[-1]
         
-        # If on different laps, calculate based on lap difference
-        lap_diff = latest_d1['lap_number'] - latest_d2['lap_number']
+        # If on different laps, calculate based on lap difference (as Python
+        # ints, since the unsigned lap numbers would wrap when subtracted)
+        lap_diff = int(latest_d1['lap_number']) - int(latest_d2['lap_number'])
         
         if lap_diff != 0:
             # Estimate based on average lap time
@@ -90,46 +283,114 @@ class IntervalCalculator:
         """
         Calculate interval history between two drivers for all laps
         """
-        if self.lap_data.empty:
-            return pd.DataFrame()
-            
+        return self._interval_history(driver1_num, driver2_num)
+    
+    def calculate_interval_history_incremental(self, driver1_num: int, driver2_num: int,
+                                               since_lap: int = 0) -> pd.DataFrame:
+        """
+        Calculate interval history only for laps after since_lap
+
+        The returned rows match the tail of calculate_interval_history, so
+        callers can append them to a cached history. interval_change and
+        closing_rate are computed with the preceding laps as context,
+        assuming consecutive lap numbers.
+        """
+        history = self._interval_history(driver1_num, driver2_num,
+                                         min_lap=since_lap - self._CONTEXT_LAPS)
+        if len(history) == 0:
+            return history
+        return history[history['lap_number'] > since_lap].reset_index(drop=True)
+    
+    def _interval_history(self, driver1_num: int, driver2_num: int,
+                          min_lap: Optional[int] = None) -> pd.DataFrame:
+        """Interval history for laps after min_lap (all laps if None)"""
         # Get lap data for both drivers
-        d1_laps = self.lap_data[self.lap_data['driver_number'] == driver1_num].copy()
-        d2_laps = self.lap_data[self.lap_data['driver_number'] == driver2_num].copy()
+        d1_laps = self._driver_laps(driver1_num)
+        d2_laps = self._driver_laps(driver2_num)
+        if len(d1_laps) == 0 or len(d2_laps) == 0:
+            return pd.DataFrame()
+        if min_lap is not None:
+            d1_laps = d1_laps[d1_laps['lap_number'] > min_lap]
+            d2_laps = d2_laps[d2_laps['lap_number'] > min_lap]
         
-        if d1_laps.empty or d2_laps.empty:
+        if len(d1_laps) == 0 or len(d2_laps) == 0:
             return pd.DataFrame()
             
-        # Merge on lap number
-        merged = pd.merge(
-            d1_laps[['lap_number', 'date_start', 'position']],
-            d2_laps[['lap_number', 'date_start', 'position']],
-            on='lap_number',
-            suffixes=('_d1', '_d2')
+        # Match laps and calculate interval (positive = driver1 ahead) in one pass
+        idx_d1, idx_d2, interval = compute_intervals_njit(
+            d1_laps['lap_number'].to_numpy(dtype=np.int64), _to_ns(d1_laps['date_start']),
+            d2_laps['lap_number'].to_numpy(dtype=np.int64), _to_ns(d2_laps['date_start'])
         )
         
-        # Calculate interval (positive = driver1 ahead)
-        merged['interval'] = (merged['date_start_d2'] - merged['date_start_d1']).dt.total_seconds()
+        # Drop laps a driver hasn't started yet, so their NaN interval
+        # doesn't leak into the trend columns
+        complete = ~np.isnan(interval)
+        if not complete.all():
+            idx_d1, idx_d2, interval = idx_d1[complete], idx_d2[complete], interval[complete]
         
-        # Add position information
-        merged['position_d1'] = merged['position_d1'].astype(int)
-        merged['position_d2'] = merged['position_d2'].astype(int)
+        # Calculate cumulative gap trend on the raw arrays
+        interval_change = np.diff(interval, prepend=np.nan)
+        # 3-lap rolling mean from shifted slices; a NaN anywhere in the window
+        # propagates, as with rolling(window=3).mean()
+        closing_rate = np.full_like(interval_change, np.nan)
+        closing_rate[2:] = (interval_change[:-2] + interval_change[1:-1] + interval_change[2:]) / 3.0
+        
+        # Build the result in its final column order in one go
+        return pd.DataFrame({
+            'lap_number': d1_laps['lap_number'].to_numpy()[idx_d1],
+            'interval': interval,
+            'position_d1': self._lap_positions(driver1_num, d1_laps)[idx_d1],
+            'position_d2': self._lap_positions(driver2_num, d2_laps)[idx_d2],
+            'interval_change': interval_change,
+            'closing_rate': closing_rate
+        })
+    
+    def _lap_positions(self, driver_num: int, laps: pd.DataFrame) -> np.ndarray:
+        """
+        Race position of a driver at each of the given laps
+
+        Taken from the lap rows when they carry it (FastF1, recordings);
+        OpenF1 /laps has no position, so otherwise it is the driver's latest
+        position sample at or before the lap start. 0 where unknown.
+        """
+        if 'position' in laps.columns:
+            return laps['position'].fillna(0).to_numpy().astype(int)
         
-        # Calculate cumulative gap trend
-        merged['interval_change'] = merged['interval'].diff()
-        merged['closing_rate'] = merged['interval_change'].rolling(window=3).mean()
+        positions = self.position_data
+        if len(positions) == 0:
+            return np.zeros(len(laps), dtype=int)
+        samples = positions[positions['driver_number'] == driver_num].sort_values('date')
+        if len(samples) == 0:
+            return np.zeros(len(laps), dtype=int)
         
-        return merged[['lap_number', 'interval', 'position_d1', 'position_d2', 
-                      'interval_change', 'closing_rate']]
+        # As-of lookup; NaT lap starts sort first and so find no sample
+        idx = np.searchsorted(_to_ns(samples['date']), _to_ns(laps['date_start']), side='right') - 1
+        sample_positions = samples['position'].fillna(0).to_numpy().astype(int)
+        return np.where(idx >= 0, sample_positions[np.maximum(idx, 0)], 0)
     
     def get_current_interval(self, driver1_num: int, driver2_num: int) -> Dict:
         """
         Get current interval and related statistics
+
+        Memoized per driver pair until the lap or position data changes, so
+        UI refreshes between laps don't recompute the history.
         """
+        key = (driver1_num, driver2_num)
+        version = (self._lap_version, self._pos_version)
+        cached = self._interval_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return dict(cached[1])
+        
+        stats = self._current_interval(driver1_num, driver2_num)
+        self._interval_cache[key] = (version, stats)
+        return dict(stats)
+    
+    def _current_interval(self, driver1_num: int, driver2_num: int) -> Dict:
+        """Interval statistics for the latest common lap"""
         # Calculate full history
         history = self.calculate_interval_history(driver1_num, driver2_num)
         
-        if history.empty:
+        if len(history) == 0:
             return {
                 'current_interval': None,
                 'lap': 0,
@@ -139,12 +400,15 @@ class IntervalCalculator:
                 'position_d2': 0
             }
             
-        # Get latest data
-        latest = history.iloc[-1]
+        # Read the latest row straight from the column arrays
+        last = len(history) - 1
+        closing_rate = history['closing_rate'].iat[last]
         
         # Determine trend
         if len(history) >= 3:
-            recent_changes = history['interval_change'].tail(3).mean()
+            recent = history['interval_change'].to_numpy()[-3:]
+            recent = recent[~np.isnan(recent)]
+            recent_changes = recent.mean() if recent.size else np.nan
             if recent_changes < -0.1:
                 trend = 'closing'  # Gap is reducing (driver1 catching)
             elif recent_changes > 0.1:
@@ -155,61 +419,67 @@ class IntervalCalculator:
             trend = 'unknown'
             
         return {
-            'current_interval': latest['interval'],
-            'lap': int(latest['lap_number']),
+            'current_interval': history['interval'].iat[last],
+            'lap': int(history['lap_number'].to_numpy()[last]),
             'trend': trend,
-            'closing_rate': latest['closing_rate'] if pd.notna(latest['closing_rate']) else 0.0,
-            'position_d1': int(latest['position_d1']),
-            'position_d2': int(latest['position_d2'])
+            'closing_rate': closing_rate if pd.notna(closing_rate) else 0.0,
+            'position_d1': int(history['position_d1'].to_numpy()[last]),
+            'position_d2': int(history['position_d2'].to_numpy()[last])
         }
     
     def _get_average_lap_time(self, driver_num: int) -> Optional[float]:
+        """Average lap time for a driver, memoized until the lap data changes"""
+        cached = self._avg_lap_cache.get(driver_num)
+        if cached is not None and cached[0] == self._lap_version:
+            return cached[1]
+        
+        avg_lap = self._average_lap_time(driver_num)
+        self._avg_lap_cache[driver_num] = (self._lap_version, avg_lap)
+        return avg_lap
+    
+    def _average_lap_time(self, driver_num: int) -> Optional[float]:
         """Calculate average lap time for a driver"""
-        driver_laps = self.lap_data[self.lap_data['driver_number'] == driver_num]
+        driver_laps = self._driver_laps(driver_num)
         
         if len(driver_laps) < 2:
             return None
             
-        # Calculate lap times from consecutive laps
-        driver_laps_sorted = driver_laps.sort_values('lap_number')
-        lap_times = []
-        
-        for i in range(1, len(driver_laps_sorted)):
-            lap_time = (driver_laps_sorted.iloc[i]['date_start'] - 
-                       driver_laps_sorted.iloc[i-1]['date_start']).total_seconds()
-            
-            # Filter out outliers (pit stops, safety car, etc.)
-            if 60 < lap_time < 150:  # Reasonable F1 lap time range
-                lap_times.append(lap_time)
-                
-        return np.mean(lap_times) if lap_times else None
+        avg_lap = average_lap_time_njit(_to_ns(driver_laps['date_start']))
+        return None if np.isnan(avg_lap) else float(avg_lap)
     
-    def detect_events(self, driver_num: int) -> List[Dict]:
+    def detect_events(self, driver_num: int) -> pd.DataFrame:
         """
         Detect events like pit stops, fastest laps, etc.
+
+        Returns a DataFrame with columns lap, type and duration, so events
+        of several drivers can be combined with pd.concat and sort_values.
+        Results are memoized per driver until the lap data changes.
         """
-        events: list = []
-        driver_laps = self.lap_data[self.lap_data['driver_number'] == driver_num]
+        cached = self._events_cache.get(driver_num)
+        if cached is not None and cached[0] == self._lap_version:
+            return cached[1]
         
-        if len(driver_laps) < 2:
-            return events
-            
-        driver_laps_sorted = driver_laps.sort_values('lap_number')
+        events = self._detect_events(driver_num)
+        self._events_cache[driver_num] = (self._lap_version, events)
+        return events
+    
+    def _detect_events(self, driver_num: int) -> pd.DataFrame:
+        """Scan a driver's laps for events"""
+        driver_laps = self._driver_laps(driver_num)
         
-        for i in range(1, len(driver_laps_sorted)):
-            lap_time = (driver_laps_sorted.iloc[i]['date_start'] - 
-                       driver_laps_sorted.iloc[i-1]['date_start']).total_seconds()
+        # Pit stops are laps well above the average, computed once per scan
+        avg_lap = self._get_average_lap_time(driver_num) if len(driver_laps) >= 2 else None
+        if not avg_lap:
+            return pd.DataFrame(columns=self._EVENT_COLUMNS)
             
-            # Detect pit stop (lap time > 30s longer than average)
-            avg_lap = self._get_average_lap_time(driver_num)
-            if avg_lap and lap_time > avg_lap + 30:
-                events.append({
-                    'type': 'pit_stop',
-                    'lap': int(driver_laps_sorted.iloc[i]['lap_number']),
-                    'duration': lap_time - avg_lap
-                })
-                
-        return events
+        idx, duration = detect_pit_stops_njit(_to_ns(driver_laps['date_start']),
+                                              float(avg_lap))
+        
+        return pd.DataFrame({
+            'lap': driver_laps['lap_number'].to_numpy(dtype=np.int64)[idx],
+            'type': 'pit_stop',
+            'duration': duration
+        }, columns=self._EVENT_COLUMNS)
 
 
 class RaceAnalyzer:
@@ -30,7 +30,7 @@ def _get_available_years() -> list[int]:
 def _fetch_schedule(year: int) -> list[dict]:
     """Fetch and cache the event schedule for a given year.
 
-    Returns a list of dicts with keys: round, name, event_format, sessions.
+    Returns a list of dicts with keys: round, name, label, event_format, sessions.
     Each session entry is (session_key, session_name, session_date_utc).
     """
     try:
@@ -53,6 +53,7 @@ def _fetch_schedule(year: int) -> list[dict]:
             events.append({
                 "round": round_num,
                 "name": str(row["EventName"]),
+                "label": f"R{round_num:02d} – {row['EventName']}",
                 "country": str(row.get("Country", "")),
                 "event_format": str(row.get("EventFormat", "conventional")),
                 "event_date": str(row.get("EventDate", "")),
@@ -134,11 +135,11 @@ def render_session_selector(sidebar: bool = True) -> Optional[SessionSelection]:
         return None
 
     # ── Grand Prix dropdown ────────────────────────────────────────
-    event_names = [f"R{e['round']:02d} – {e['name']}" for e in events]
+    # Labels are built once with the cached schedule, not on every rerun
     selected_event_idx = container.selectbox(
         "Grand Prix",
-        range(len(event_names)),
-        format_func=lambda i: event_names[i],
+        range(len(events)),
+        format_func=lambda i: events[i]["label"],
         key="sel_gp",
     )
     selected_event = events[selected_event_idx]
@@ -0,0 +1,410 @@
+"""Tests for F1DataFetcher and SessionRecorder in data_fetcher."""
+
+import gzip
+import json
+
+import pandas as pd
+import pytest
+import requests
+
+import data_fetcher
+from data_fetcher import F1DataFetcher, SessionRecorder
+
+T0 = pd.Timestamp("2024-03-02 15:00:00", tz="UTC")
+
+
+@pytest.fixture
+def recordings_dir(tmp_path, monkeypatch):
+    """Point SessionRecorder at a temporary recordings directory."""
+    monkeypatch.setattr(data_fetcher, "RECORDED_SESSIONS_DIR", tmp_path)
+    return tmp_path
+
+
+def _make_recorder(name: str = "test_session") -> SessionRecorder:
+    recorder = SessionRecorder(name)
+    recorder.set_drivers({1: {"driver_number": 1, "name_acronym": "VER"}})
+    recorder.add_position_data(
+        pd.DataFrame(
+            {
+                "driver_number": [1, 44],
+                "date": [T0, T0 + pd.Timedelta(seconds=4)],
+                "position": [1, 2],
+            }
+        )
+    )
+    recorder.add_lap_data(
+        pd.DataFrame(
+            {
+                "driver_number": [1],
+                "lap_number": [1],
+                "date_start": [T0],
+                "position": [1],
+            }
+        )
+    )
+    return recorder
+
+
+class TestF1DataFetcher:
+    """Tests for the F1DataFetcher HTTP layer."""
+
+    @pytest.fixture(autouse=True)
+    def http_cache(self, tmp_path, monkeypatch):
+        """Keep the requests-cache database out of the working tree."""
+        monkeypatch.setattr(data_fetcher, "OPENF1_CACHE_PATH", tmp_path / "openf1_cache")
+
+    def test_only_static_endpoints_are_cached(self):
+        session = F1DataFetcher().session
+        base = data_fetcher.OPENF1_BASE_URL
+
+        assert session.settings.expire_after == data_fetcher.DO_NOT_CACHE
+        patterns = session.settings.urls_expire_after
+        assert patterns[f"{base.split('://', 1)[-1]}/drivers"] == data_fetcher.DRIVERS_CACHE_TTL
+        assert not any("laps" in p or "position" in p for p in patterns)
+
+    def test_adapter_retries_transient_errors(self):
+        adapter = F1DataFetcher().session.get_adapter(data_fetcher.OPENF1_BASE_URL)
+
+        assert adapter.max_retries.total == data_fetcher.RETRY_ATTEMPTS - 1
+        assert 503 in adapter.max_retries.status_forcelist
+
+    def test_failed_request_returns_none(self, monkeypatch):
+        fetcher = F1DataFetcher()
+
+        def fail(*args, **kwargs):
+            raise requests.exceptions.ConnectionError("offline")
+
+        monkeypatch.setattr(fetcher.session, "get", fail)
+
+        assert fetcher._make_request("sessions") is None
+        assert fetcher.get_lap_data(9999, [1, 44]).empty
+
+    @pytest.mark.parametrize(
+        "body, expected",
+        [(b'[{"session_key": 9999}]', [{"session_key": 9999}]), (b"<html>", None)],
+    )
+    def test_response_body_decoded(self, monkeypatch, body, expected):
+        fetcher = F1DataFetcher()
+        response = requests.Response()
+        response.status_code = 200
+        response._content = body
+        monkeypatch.setattr(fetcher.session, "get", lambda *args, **kwargs: response)
+
+        assert fetcher._make_request("sessions") == expected
+
+    def test_lap_start_dates_parsed(self, monkeypatch):
+        fetcher = F1DataFetcher()
+        laps = [
+            {"driver_number": 1, "lap_number": 1, "date_start": "2024-03-02T15:00:00+00:00"},
+            {"driver_number": 1, "lap_number": 2, "date_start": "2024-03-02T15:01:30.5+00:00"},
+            {"driver_number": 1, "lap_number": 3, "date_start": None},
+        ]
+        monkeypatch.setattr(fetcher, "_make_request", lambda endpoint, params: laps)
+
+        starts = fetcher.get_lap_data(9999, [1])["date_start"]
+
+        assert list(starts[:2]) == [T0, T0 + pd.Timedelta(seconds=90.5)]
+        assert pd.isna(starts.iat[2])
+
+    def test_position_records_built_column_wise(self, monkeypatch):
+        fetcher = F1DataFetcher()
+        records = [
+            {"driver_number": 1, "date": "2024-03-02T15:00:00+00:00", "position": 1},
+            {"driver_number": 44, "date": "2024-03-02T15:00:01+00:00", "position": 2},
+        ]
+        monkeypatch.setattr(fetcher, "_make_request", lambda endpoint, params: records)
+
+        positions = fetcher.get_position_data(9999, [1, 44])
+
+        assert list(positions.columns) == ["driver_number", "date", "position"]
+        assert list(positions["position"]) == [1, 2]
+        assert pd.api.types.is_integer_dtype(positions["driver_number"])
+
+    def test_inconsistent_records_fall_back_to_pandas(self, monkeypatch):
+        fetcher = F1DataFetcher()
+        records = [{"driver_number": 1, "position": 1}, {"driver_number": 1, "position": "DNF"}]
+        monkeypatch.setattr(fetcher, "_make_request", lambda endpoint, params: records)
+
+        assert list(fetcher.get_position_data(9999, [1])["position"]) == [1, "DNF"]
+
+    def test_recent_sessions_merges_years(self, monkeypatch):
+        fetcher = F1DataFetcher()
+        year = data_fetcher.datetime.now().year
+        by_year = {
+            year: [{"session_key": 2, "date_start": f"{year}-03-02"}],
+            year - 1: [{"session_key": 1, "date_start": f"{year - 1}-11-24"}],
+        }
+        monkeypatch.setattr(
+            fetcher, "_make_request", lambda endpoint, params: by_year.get(params["year"])
+        )
+
+        sessions = fetcher.get_recent_sessions()
+
+        assert [s["session_key"] for s in sessions] == [2, 1]
+
+
+@pytest.mark.usefixtures("recordings_dir")
+class TestSessionRecorderRecording:
+    """Tests for SessionRecorder.add_position_data / add_lap_data."""
+
+    def test_batches_streamed_to_parquet(self):
+        recorder = _make_recorder()
+
+        assert recorder.data["position_data"] == []
+        assert recorder.pos_path.exists()
+        assert recorder.lap_path.exists()
+
+    def test_dates_stored_as_utc(self):
+        recorder = _make_recorder()
+        recorder.save()
+
+        positions = recorder.get_position_dataframe()
+        assert str(positions["date"].dt.tz) == "UTC"
+        assert recorder.get_lap_dataframe()["date_start"].iloc[0] == T0
+
+    def test_naive_dates_are_treated_as_utc(self):
+        recorder = SessionRecorder("test_session")
+        recorder.add_position_data(
+            pd.DataFrame({"driver_number": [1], "date": [T0.tz_localize(None)], "position": [1]})
+        )
+        recorder.save()
+
+        assert recorder.get_position_dataframe()["date"].iloc[0] == T0
+
+    def test_string_dates_are_parsed_on_record(self):
+        recorder = SessionRecorder("test_session")
+        recorder.add_position_data(
+            pd.DataFrame(
+                {"driver_number": [1], "date": ["2024-03-02T15:00:00+00:00"], "position": [1]}
+            )
+        )
+        recorder.save()
+
+        assert recorder.get_position_dataframe()["date"].iloc[0] == T0
+
+    def test_batches_concatenate(self):
+        recorder = _make_recorder()
+        recorder.add_position_data(
+            pd.DataFrame({"driver_number": [1], "date": [T0 + pd.Timedelta(seconds=8)], "position": [1]})
+        )
+        recorder.save()
+
+        assert len(recorder.get_position_dataframe()) == 3
+
+    def test_later_batches_cast_to_first_schema(self):
+        recorder = _make_recorder()
+        recorder.add_position_data(
+            pd.DataFrame({"driver_number": [1], "date": [T0], "position": [3.0]})
+        )
+        recorder.save()
+
+        assert list(recorder.get_position_dataframe()["position"]) == [1, 2, 3]
+
+    def test_null_first_batch_column_accepts_later_values(self):
+        recorder = SessionRecorder("test_session")
+        recorder.add_lap_data(
+            pd.DataFrame(
+                {
+                    "driver_number": [1],
+                    "lap_number": [1],
+                    "date_start": [T0],
+                    "lap_duration": [None],
+                    "is_pit_out_lap": [None],
+                }
+            )
+        )
+        recorder.add_lap_data(
+            pd.DataFrame(
+                {
+                    "driver_number": [1],
+                    "lap_number": [2],
+                    "date_start": [T0 + pd.Timedelta(seconds=91.2)],
+                    "lap_duration": [91.2],
+                    "is_pit_out_lap": [False],
+                }
+            )
+        )
+        recorder.save()
+
+        laps = recorder.get_lap_dataframe()
+        assert laps["lap_duration"].isna().iat[0]
+        assert laps["lap_duration"].iat[1] == pytest.approx(91.2)
+        assert not laps["is_pit_out_lap"].iat[1]
+
+    def test_unsaved_streams_not_readable(self):
+        assert _make_recorder().get_position_dataframe().empty
+
+    def test_mixed_subsecond_dates_round_trip(self):
+        recorder = SessionRecorder("test_session")
+        dates = [T0, T0 + pd.Timedelta(milliseconds=250)]
+        recorder.add_position_data(
+            pd.DataFrame({"driver_number": [1, 1], "date": dates, "position": [1, 1]})
+        )
+        recorder.save()
+
+        assert list(recorder.get_position_dataframe()["date"]) == dates
+
+    def test_input_frame_not_mutated(self):
+        df = pd.DataFrame({"driver_number": [1], "date": [T0], "position": [1]})
+
+        SessionRecorder("test_session").add_position_data(df)
+
+        assert df["date"].iloc[0] == T0
+
+
+class TestSessionRecorderPersistence:
+    """Tests for SessionRecorder.save / load round trips."""
+
+    def test_round_trip(self, recordings_dir):
+        _make_recorder().save()
+
+        loaded = SessionRecorder("test_session")
+        assert loaded.load()
+
+        assert loaded.data["metadata"]["drivers"]["1"]["name_acronym"] == "VER"
+        positions = loaded.get_position_dataframe()
+        assert list(positions["position"]) == [1, 2]
+        assert positions["date"].iloc[1] == T0 + pd.Timedelta(seconds=4)
+        assert loaded.get_lap_dataframe()["date_start"].iloc[0] == T0
+
+    def test_streams_saved_as_parquet(self, recordings_dir):
+        _make_recorder().save()
+
+        positions = pd.read_parquet(recordings_dir / "test_session.positions.parquet")
+        laps = pd.read_parquet(recordings_dir / "test_session.laps.parquet")
+
+        assert len(positions) == 2
+        assert list(laps["lap_number"]) == [1]
+
+    def test_reads_only_requested_columns(self, recordings_dir):
+        _make_recorder().save()
+        loaded = SessionRecorder("test_session")
+        loaded.load()
+
+        positions = loaded.get_position_dataframe(columns=["date", "position"])
+
+        assert list(positions.columns) == ["date", "position"]
+
+    def test_compressed_round_trip(self, recordings_dir, monkeypatch):
+        monkeypatch.setattr(data_fetcher, "COMPRESSION", True)
+        _make_recorder().save()
+
+        assert (recordings_dir / "test_session.metadata.json").read_bytes()[:2] == b"\x1f\x8b"
+
+        loaded = SessionRecorder("test_session")
+        assert loaded.load()
+        assert len(loaded.get_position_dataframe()) == 2
+
+    def test_loads_uncompressed_file_when_compression_enabled(self, recordings_dir, monkeypatch):
+        _make_recorder().save()
+        monkeypatch.setattr(data_fetcher, "COMPRESSION", True)
+
+        loaded = SessionRecorder("test_session")
+
+        assert loaded.load()
+        assert len(loaded.get_lap_dataframe()) == 1
+
+    def test_loads_json_record_format(self, recordings_dir):
+        legacy = {
+            "metadata": {"session_name": "legacy", "drivers": {}},
+            "position_data": [
+                {"driver_number": 1, "date": "2024-03-02T15:00:00+00:00", "position": 1}
+            ],
+            "lap_data": [
+                {"driver_number": 1, "lap_number": 1, "date_start": "2024-03-02T15:00:00+00:00"}
+            ],
+        }
+        (recordings_dir / "legacy.json").write_text(json.dumps(legacy))
+
+        loaded = SessionRecorder("legacy")
+
+        assert loaded.load()
+        assert loaded.get_position_dataframe()["date"].iloc[0] == T0
+        assert loaded.get_lap_dataframe()["date_start"].iloc[0] == T0
+
+    def test_json_record_dates_with_mixed_offsets(self, recordings_dir):
+        legacy = {
+            "metadata": {"session_name": "legacy", "drivers": {}},
+            "position_data": [
+                {"driver_number": 1, "date": "2024-03-02T15:00:00", "position": 1},
+                {"driver_number": 1, "date": "2024-03-02T16:00:00.5+01:00", "position": 1},
+            ],
+            "lap_data": [],
+        }
+        (recordings_dir / "legacy.json").write_text(json.dumps(legacy))
+
+        loaded = SessionRecorder("legacy")
+
+        assert loaded.load()
+        dates = loaded.get_position_dataframe()["date"]
+        assert list(dates) == [T0, T0 + pd.Timedelta(milliseconds=500)]
+
+    def test_resaved_json_recording_uses_parquet(self, recordings_dir):
+        legacy = {
+            "metadata": {"session_name": "legacy", "drivers": {}},
+            "position_data": [
+                {"driver_number": 1, "date": "2024-03-02T15:00:00+00:00", "position": 1}
+            ],
+            "lap_data": [],
+        }
+        (recordings_dir / "legacy.json").write_text(json.dumps(legacy))
+
+        loaded = SessionRecorder("legacy")
+        loaded.load()
+        loaded.save()
+
+        positions = pd.read_parquet(recordings_dir / "legacy.positions.parquet")
+        assert positions["date"].iloc[0] == T0
+
+    def test_missing_recording(self, recordings_dir):
+        assert not SessionRecorder("does_not_exist").load()
+
+    def test_list_recordings(self, recordings_dir):
+        _make_recorder("b_session").save()
+        _make_recorder("a_session").save()
+
+        assert SessionRecorder.list_recordings() == ["a_session", "b_session"]
+
+    def test_list_recordings_includes_json_recordings(self, recordings_dir):
+        _make_recorder("new_session").save()
+        (recordings_dir / "old_session.json").write_text(json.dumps({"metadata": {}}))
+
+        assert SessionRecorder.list_recordings() == ["new_session", "old_session"]
+
+
+@pytest.mark.usefixtures("recordings_dir")
+class TestSessionRecorderReplay:
+    """Tests for SessionRecorder.replay_positions."""
+
+    def test_yields_batches_in_time_order(self):
+        recorder = SessionRecorder("test_session")
+        recorder.add_position_data(
+            pd.DataFrame(
+                {
+                    "driver_number": [1, 44, 1],
+                    "date": [T0 + pd.Timedelta(seconds=1), T0, T0],
+                    "position": [1, 2, 1],
+                }
+            )
+        )
+        recorder.save()
+
+        batches = list(recorder.replay_positions(speed=1e6))
+
+        assert [batch["date"].iat[0] for batch in batches] == [T0, T0 + pd.Timedelta(seconds=1)]
+        assert [len(batch) for batch in batches] == [2, 1]
+
+    def test_paced_by_recorded_gaps(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(data_fetcher.time, "monotonic", lambda: 100.0)
+        monkeypatch.setattr(data_fetcher.time, "sleep", sleeps.append)
+
+        recorder = _make_recorder()
+        recorder.save()
+
+        list(recorder.replay_positions(speed=2.0))
+
+        assert sleeps == [pytest.approx(2.0)]
+
+    def test_empty_recording_yields_nothing(self):
+        assert list(SessionRecorder("test_session").replay_positions()) == []
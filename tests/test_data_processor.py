@@ -0,0 +1,568 @@
+"""Tests for IntervalCalculator and the interval kernels in data_processor."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processor import (
+    IntervalCalculator,
+    average_lap_time_njit,
+    compute_intervals_njit,
+    detect_pit_stops_njit,
+)
+
+T0 = pd.Timestamp("2024-03-02 15:00:00", tz="UTC")
+
+
+def _make_lap_df(
+    driver_number: int,
+    lap_times: list[float],
+    offset: float = 0.0,
+    position: int = 1,
+) -> pd.DataFrame:
+    """Create lap rows for one driver with the given consecutive lap times."""
+    starts = offset + np.concatenate([[0.0], np.cumsum(lap_times)])
+    return pd.DataFrame(
+        {
+            "driver_number": driver_number,
+            "lap_number": np.arange(1, len(starts) + 1),
+            "date_start": T0 + pd.to_timedelta(starts, unit="s"),
+            "position": position,
+        }
+    )
+
+
+def _make_calculator(*frames: pd.DataFrame) -> IntervalCalculator:
+    calc = IntervalCalculator()
+    calc.update_lap_data(pd.concat(frames, ignore_index=True))
+    return calc
+
+
+class TestComputeIntervals:
+    """Tests for the compute_intervals_njit lap-matching kernel."""
+
+    def test_matches_common_laps(self):
+        laps_d1 = np.array([1, 2, 3, 4], dtype=np.int64)
+        laps_d2 = np.array([2, 3, 5], dtype=np.int64)
+        start_d1 = np.array([0, 90, 180, 270], dtype=np.int64) * 10**9
+        start_d2 = np.array([91, 182, 360], dtype=np.int64) * 10**9
+
+        idx_d1, idx_d2, interval = compute_intervals_njit(laps_d1, start_d1, laps_d2, start_d2)
+
+        assert list(idx_d1) == [1, 2]
+        assert list(idx_d2) == [0, 1]
+        np.testing.assert_allclose(interval, [1.0, 2.0])
+
+    def test_no_common_laps(self):
+        laps = np.array([1, 2], dtype=np.int64)
+        other = np.array([3, 4], dtype=np.int64)
+        starts = np.zeros(2, dtype=np.int64)
+
+        _, _, interval = compute_intervals_njit(laps, starts, other, starts)
+
+        assert interval.size == 0
+
+    def test_missing_start_time_is_nan(self):
+        laps = np.array([1, 2], dtype=np.int64)
+        start_d1 = np.array([0, np.iinfo(np.int64).min], dtype=np.int64)
+        start_d2 = np.array([10**9, 2 * 10**9], dtype=np.int64)
+
+        _, _, interval = compute_intervals_njit(laps, start_d1, laps, start_d2)
+
+        assert interval[0] == pytest.approx(1.0)
+        assert np.isnan(interval[1])
+
+
+class TestDetectPitStops:
+    """Tests for the detect_pit_stops_njit lap scan."""
+
+    def test_flags_slow_laps(self):
+        start_ns = np.array([0, 90, 180, 305, 395], dtype=np.int64) * 10**9
+
+        idx, duration = detect_pit_stops_njit(start_ns, 90.0)
+
+        assert list(idx) == [3]
+        np.testing.assert_allclose(duration, [35.0])
+
+    def test_skips_missing_start_times(self):
+        nat = np.iinfo(np.int64).min
+        start_ns = np.array([0, nat, 300 * 10**9], dtype=np.int64)
+
+        idx, _ = detect_pit_stops_njit(start_ns, 90.0)
+
+        assert idx.size == 0
+
+    def test_single_lap(self):
+        idx, duration = detect_pit_stops_njit(np.zeros(1, dtype=np.int64), 90.0)
+
+        assert idx.size == 0
+        assert duration.size == 0
+
+
+class TestAverageLapTimeKernel:
+    """Tests for the average_lap_time_njit outlier-filtered mean."""
+
+    def test_ignores_out_of_range_laps(self):
+        start_ns = np.array([0, 90, 182, 400, 491, 520], dtype=np.int64) * 10**9
+
+        assert average_lap_time_njit(start_ns) == pytest.approx(91.0)
+
+    def test_no_laps_in_range_is_nan(self):
+        start_ns = np.array([0, 30, np.iinfo(np.int64).min], dtype=np.int64)
+
+        assert np.isnan(average_lap_time_njit(start_ns))
+
+
+class TestCalculateIntervalHistory:
+    """Tests for IntervalCalculator.calculate_interval_history."""
+
+    def test_positive_when_driver1_ahead(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 5),
+            _make_lap_df(44, [90.5] * 5, offset=1.0, position=2),
+        )
+
+        history = calc.calculate_interval_history(1, 44)
+
+        assert list(history["lap_number"]) == [1, 2, 3, 4, 5, 6]
+        np.testing.assert_allclose(history["interval"], [1.0, 1.5, 2.0, 2.5, 3.0, 3.5])
+        assert list(history["position_d1"]) == [1] * 6
+        assert list(history["position_d2"]) == [2] * 6
+
+    def test_swapped_drivers_negate_interval(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 3),
+            _make_lap_df(44, [90.5] * 3, offset=1.0, position=2),
+        )
+
+        forward = calc.calculate_interval_history(1, 44)
+        backward = calc.calculate_interval_history(44, 1)
+
+        np.testing.assert_allclose(forward["interval"], -backward["interval"])
+
+    def test_only_common_laps_are_returned(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 5),
+            _make_lap_df(44, [90.0] * 2, offset=0.5, position=2),
+        )
+
+        history = calc.calculate_interval_history(1, 44)
+
+        assert list(history["lap_number"]) == [1, 2, 3]
+
+    def test_unsorted_lap_data(self):
+        shuffled = _make_lap_df(1, [90.0] * 4).sample(frac=1.0, random_state=0)
+        calc = _make_calculator(shuffled, _make_lap_df(44, [91.0] * 4, position=2))
+
+        history = calc.calculate_interval_history(1, 44)
+
+        assert list(history["lap_number"]) == [1, 2, 3, 4, 5]
+        np.testing.assert_allclose(history["interval"], [0.0, 1.0, 2.0, 3.0, 4.0])
+
+    def test_interval_change_and_closing_rate(self):
+        # Lap 6 has no start time yet, so its interval is unknown
+        d2_laps = _make_lap_df(44, [90.5] * 5, offset=1.0, position=2)
+        d2_laps.loc[d2_laps["lap_number"] == 6, "date_start"] = pd.NaT
+        calc = _make_calculator(_make_lap_df(1, [90.0] * 5), d2_laps)
+
+        history = calc.calculate_interval_history(1, 44)
+
+        assert list(history["lap_number"]) == [1, 2, 3, 4, 5]
+        assert not history["interval"].isna().any()
+        assert np.isnan(history["interval_change"].iloc[0])
+        np.testing.assert_allclose(history["interval_change"].iloc[1:], 0.5)
+        assert history["closing_rate"].iloc[:3].isna().all()
+        np.testing.assert_allclose(history["closing_rate"].iloc[3:], 0.5)
+
+    def test_closing_rate_matches_rolling_mean(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0, 91.0, 90.2, 92.0, 90.1, 90.7]),
+            _make_lap_df(44, [90.5, 90.3, 91.4, 90.0, 90.9, 90.2], offset=1.0, position=2),
+        )
+
+        history = calc.calculate_interval_history(1, 44)
+
+        np.testing.assert_allclose(
+            history["closing_rate"], history["interval_change"].rolling(window=3).mean()
+        )
+
+    def test_positions_from_samples_when_laps_lack_them(self):
+        laps = pd.concat(
+            [_make_lap_df(1, [90.0] * 2), _make_lap_df(44, [90.5] * 2, offset=1.0)],
+            ignore_index=True,
+        ).drop(columns="position")
+        calc = IntervalCalculator()
+        calc.update_lap_data(laps)
+        calc.update_position_data(
+            pd.DataFrame(
+                {
+                    "driver_number": [1, 44, 1, 44],
+                    "date": [T0, T0, T0 + pd.Timedelta(seconds=100), T0 + pd.Timedelta(seconds=100)],
+                    "position": [2, 1, 1, 2],
+                }
+            )
+        )
+
+        history = calc.calculate_interval_history(1, 44)
+
+        assert list(history["position_d1"]) == [2, 2, 1]
+        assert list(history["position_d2"]) == [1, 1, 2]
+
+    def test_positions_unknown_without_samples(self):
+        laps = pd.concat(
+            [_make_lap_df(1, [90.0] * 2), _make_lap_df(44, [90.5] * 2, offset=1.0)],
+            ignore_index=True,
+        ).drop(columns="position")
+        calc = IntervalCalculator()
+        calc.update_lap_data(laps)
+
+        history = calc.calculate_interval_history(1, 44)
+
+        np.testing.assert_allclose(history["interval"], [1.0, 1.5, 2.0])
+        assert list(history["position_d1"]) == [0, 0, 0]
+
+    def test_unknown_driver_returns_empty(self):
+        calc = _make_calculator(_make_lap_df(1, [90.0] * 3))
+
+        assert calc.calculate_interval_history(1, 44).empty
+
+    def test_no_lap_data_returns_empty(self):
+        assert IntervalCalculator().calculate_interval_history(1, 44).empty
+
+
+class TestCalculateIntervalAtLine:
+    """Tests for IntervalCalculator.calculate_interval_at_line."""
+
+    def test_same_lap(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 3),
+            _make_lap_df(44, [90.5] * 3, offset=1.0, position=2),
+        )
+
+        assert calc.calculate_interval_at_line(1, 44) == pytest.approx(-2.5)
+
+    def test_uses_latest_lap_of_unsorted_data(self):
+        shuffled = _make_lap_df(1, [90.0] * 3).sample(frac=1.0, random_state=0)
+        calc = _make_calculator(shuffled, _make_lap_df(44, [90.5] * 3, offset=1.0, position=2))
+
+        assert calc.calculate_interval_at_line(1, 44) == pytest.approx(-2.5)
+
+    def test_specific_lap(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 3),
+            _make_lap_df(44, [90.5] * 3, offset=1.0, position=2),
+        )
+
+        assert calc.calculate_interval_at_line(1, 44, lap=2) == pytest.approx(-1.5)
+
+    def test_lapped_driver1_is_negative(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 2),
+            _make_lap_df(44, [90.0] * 4, position=2),
+        )
+
+        assert calc.calculate_interval_at_line(1, 44) == pytest.approx(-180.0)
+
+
+class TestCalculateIntervalHistoryIncremental:
+    """Tests for IntervalCalculator.calculate_interval_history_incremental."""
+
+    def test_matches_tail_of_full_history(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0, 91.0, 90.2, 92.0, 90.1, 90.7]),
+            _make_lap_df(44, [90.5, 90.3, 91.4, 90.0, 90.9, 90.2], offset=1.0, position=2),
+        )
+
+        full = calc.calculate_interval_history(1, 44)
+        tail = calc.calculate_interval_history_incremental(1, 44, since_lap=4)
+
+        pd.testing.assert_frame_equal(tail, full[full["lap_number"] > 4].reset_index(drop=True))
+
+    def test_since_zero_returns_everything(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 3),
+            _make_lap_df(44, [90.5] * 3, offset=1.0, position=2),
+        )
+
+        pd.testing.assert_frame_equal(
+            calc.calculate_interval_history_incremental(1, 44),
+            calc.calculate_interval_history(1, 44),
+        )
+
+    def test_no_new_laps_returns_empty(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 3),
+            _make_lap_df(44, [90.5] * 3, offset=1.0, position=2),
+        )
+
+        assert calc.calculate_interval_history_incremental(1, 44, since_lap=4).empty
+
+
+class TestDetectEvents:
+    """Tests for IntervalCalculator.detect_events."""
+
+    def test_pit_stop_detected(self):
+        calc = _make_calculator(_make_lap_df(1, [90.0] * 5 + [130.0] + [90.0] * 5))
+
+        events = calc.detect_events(1)
+
+        assert list(events.columns) == ["lap", "type", "duration"]
+        assert list(events["lap"]) == [7]
+        assert list(events["type"]) == ["pit_stop"]
+        assert events["duration"].iat[0] == pytest.approx(130.0 - 1030.0 / 11)
+
+    def test_no_events_is_empty_frame(self):
+        calc = _make_calculator(_make_lap_df(1, [90.0]))
+
+        events = calc.detect_events(1)
+
+        assert events.empty
+        assert list(events.columns) == ["lap", "type", "duration"]
+
+    def test_cached_until_lap_data_changes(self):
+        calc = _make_calculator(_make_lap_df(1, [90.0] * 3))
+
+        first = calc.detect_events(1)
+        assert calc.detect_events(1) is first
+
+        calc.update_lap_data(_make_lap_df(1, [90.0] * 4))
+        assert calc.detect_events(1) is not first
+
+
+class TestDriverLaps:
+    """Tests for the IntervalCalculator._driver_laps index."""
+
+    def test_sorted_per_driver(self):
+        shuffled = _make_lap_df(1, [90.0] * 4).sample(frac=1.0, random_state=0)
+        calc = _make_calculator(shuffled, _make_lap_df(44, [91.0] * 2, position=2))
+
+        assert list(calc._driver_laps(1)["lap_number"]) == [1, 2, 3, 4, 5]
+        assert set(calc._driver_laps(44)["driver_number"]) == {44}
+
+    def test_rebuilt_after_update(self):
+        calc = _make_calculator(_make_lap_df(1, [90.0]))
+        assert calc._driver_laps(44).empty
+
+        calc.update_lap_data(_make_lap_df(44, [90.0], position=2))
+
+        assert len(calc._driver_laps(44)) == 2
+
+
+class TestGetAverageLapTime:
+    """Tests for IntervalCalculator._get_average_lap_time."""
+
+    def test_ignores_outlier_laps(self):
+        calc = _make_calculator(_make_lap_df(1, [90.0, 91.0, 200.0, 92.0]))
+
+        assert calc._get_average_lap_time(1) == pytest.approx(91.0)
+
+    def test_missing_start_time_skipped(self):
+        laps = _make_lap_df(1, [90.0, 92.0, 91.0, 93.0])
+        laps.loc[1, "date_start"] = pd.NaT
+
+        assert _make_calculator(laps)._get_average_lap_time(1) == pytest.approx(92.0)
+
+    def test_single_lap_is_none(self):
+        assert _make_calculator(_make_lap_df(1, []))._get_average_lap_time(1) is None
+
+    def test_cached_until_lap_data_changes(self, monkeypatch):
+        calc = _make_calculator(_make_lap_df(1, [90.0] * 3))
+        assert calc._get_average_lap_time(1) == pytest.approx(90.0)
+
+        calls = []
+        compute = calc._average_lap_time
+        monkeypatch.setattr(calc, "_average_lap_time", lambda n: calls.append(n) or compute(n))
+        calc._get_average_lap_time(1)
+        assert calls == []
+
+        calc.update_lap_data(_make_lap_df(1, [100.0] * 4))
+        assert calc._get_average_lap_time(1) == pytest.approx(100.0)
+        assert calls == [1]
+
+
+class TestGetCurrentInterval:
+    """Tests for IntervalCalculator.get_current_interval."""
+
+    def test_latest_lap_stats(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 4),
+            _make_lap_df(44, [90.5] * 4, offset=1.0, position=2),
+        )
+
+        stats = calc.get_current_interval(1, 44)
+
+        assert stats["current_interval"] == pytest.approx(3.0)
+        assert stats["lap"] == 5
+        assert stats["trend"] == "extending"
+        assert stats["closing_rate"] == pytest.approx(0.5)
+        assert (stats["position_d1"], stats["position_d2"]) == (1, 2)
+
+    def test_closing_trend(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.5] * 4),
+            _make_lap_df(44, [90.0] * 4, offset=3.0, position=2),
+        )
+
+        assert calc.get_current_interval(1, 44)["trend"] == "closing"
+
+    def test_short_history_has_unknown_trend(self):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0]),
+            _make_lap_df(44, [90.5], offset=1.0, position=2),
+        )
+
+        stats = calc.get_current_interval(1, 44)
+
+        assert stats["trend"] == "unknown"
+        assert stats["closing_rate"] == 0.0
+
+    def test_cached_until_lap_data_changes(self, monkeypatch):
+        calc = _make_calculator(
+            _make_lap_df(1, [90.0] * 3),
+            _make_lap_df(44, [90.5] * 3, offset=1.0, position=2),
+        )
+        first = calc.get_current_interval(1, 44)
+
+        calls = []
+        compute = calc._current_interval
+        monkeypatch.setattr(calc, "_current_interval", lambda *pair: calls.append(pair) or compute(*pair))
+        assert calc.get_current_interval(1, 44) == first
+        assert calls == []
+
+        calc.update_lap_data(_make_lap_df(44, [90.5] * 4, offset=1.0, position=2))
+        calc.update_lap_data(_make_lap_df(1, [90.0] * 4))
+        assert calc.get_current_interval(1, 44)["lap"] == 5
+        assert calls == [(1, 44)]
+
+    def test_identical_lap_updates_keep_cache_warm(self, monkeypatch):
+        laps = pd.concat(
+            [_make_lap_df(1, [90.0] * 3), _make_lap_df(44, [90.5] * 3, offset=1.0, position=2)],
+            ignore_index=True,
+        )
+        calc = IntervalCalculator()
+        calc.update_lap_data(laps)
+        first = calc.get_current_interval(1, 44)
+
+        calls = []
+        compute = calc._current_interval
+        monkeypatch.setattr(calc, "_current_interval", lambda *pair: calls.append(pair) or compute(*pair))
+        calc.update_lap_data(laps.copy())
+        calc.update_lap_data(laps.copy())
+
+        assert calc.get_current_interval(1, 44) == first
+        assert calls == []
+
+    def test_no_data(self):
+        stats = IntervalCalculator().get_current_interval(1, 44)
+
+        assert stats["current_interval"] is None
+        assert stats["trend"] == "unknown"
+
+
+class TestUpdatePositionData:
+    """Tests for IntervalCalculator.update_position_data."""
+
+    def test_parses_dates_without_mutating_input(self):
+        batch = pd.DataFrame(
+            {
+                "driver_number": [1, 44],
+                "date": ["2024-03-02T15:00:00+00:00", "2024-03-02T15:00:01+00:00"],
+                "position": [1, 2],
+            }
+        )
+        calc = IntervalCalculator()
+
+        calc.update_position_data(batch)
+
+        assert pd.api.types.is_datetime64_any_dtype(calc.position_data["date"])
+        assert not pd.api.types.is_datetime64_any_dtype(batch["date"])
+
+    def test_mixed_precision_date_strings(self):
+        batch = pd.DataFrame(
+            {
+                "driver_number": [1, 44],
+                "date": ["2024-03-02T15:00:00+00:00", "2024-03-02T15:00:00.250000+00:00"],
+                "position": [1, 2],
+            }
+        )
+        calc = IntervalCalculator()
+
+        calc.update_position_data(batch)
+
+        assert list(calc.position_data["date"]) == [T0, T0 + pd.Timedelta(milliseconds=250)]
+
+    def test_mixed_offset_date_strings(self):
+        batch = pd.DataFrame(
+            {
+                "driver_number": [1, 44, 63],
+                "date": ["2024-03-02T15:00:00", "2024-03-02T16:00:00.5+01:00", "2024-03-02T15:00:01Z"],
+                "position": [1, 2, 3],
+            }
+        )
+        calc = IntervalCalculator()
+
+        calc.update_position_data(batch)
+
+        assert list(calc.position_data["date"]) == [
+            T0, T0 + pd.Timedelta(milliseconds=500), T0 + pd.Timedelta(seconds=1)
+        ]
+
+    def test_duplicates_keep_latest(self):
+        first = pd.DataFrame({"driver_number": [1], "date": [T0], "position": [2]})
+        second = pd.DataFrame({"driver_number": [1], "date": [T0], "position": [1]})
+        calc = IntervalCalculator()
+
+        calc.update_position_data(first)
+        calc.update_position_data(second)
+
+        assert list(calc.position_data["position"]) == [1]
+
+    def test_batches_merged_on_read(self):
+        calc = IntervalCalculator()
+        for second in range(3):
+            calc.update_position_data(
+                pd.DataFrame(
+                    {"driver_number": [1], "date": [T0 + pd.Timedelta(seconds=second)], "position": [1]}
+                )
+            )
+
+        assert len(calc._pos_chunks) == 3
+        assert len(calc.position_data) == 3
+        assert calc._pos_chunks == []
+
+    def test_large_backlog_flushed_without_read(self, monkeypatch):
+        monkeypatch.setattr(IntervalCalculator, "_FLUSH_ROWS", 2)
+        calc = IntervalCalculator()
+        batch = pd.DataFrame({"driver_number": [1, 44], "date": [T0, T0], "position": [1, 2]})
+
+        calc.update_position_data(batch)
+
+        assert calc._pos_chunks == []
+        assert len(calc._position_data) == 2
+
+
+class TestUpdateLapData:
+    """Tests for IntervalCalculator.update_lap_data."""
+
+    def test_key_columns_narrowed(self):
+        calc = _make_calculator(_make_lap_df(1, [90.0] * 2))
+
+        assert calc.lap_data["driver_number"].dtype == np.uint8
+        assert calc.lap_data["position"].dtype == np.uint8
+        assert calc.lap_data["lap_number"].dtype == np.uint16
+
+    def test_missing_positions_left_as_float(self):
+        laps = _make_lap_df(1, [90.0] * 2).astype({"position": float})
+        laps.loc[0, "position"] = np.nan
+
+        calc = _make_calculator(laps)
+
+        assert calc.lap_data["position"].isna().iat[0]
+
+    def test_redelivered_laps_keep_latest(self):
+        calc = IntervalCalculator()
+        calc.update_lap_data(_make_lap_df(1, [90.0] * 2, position=2))
+        calc.update_lap_data(_make_lap_df(1, [90.0] * 3, position=1))
+
+        assert len(calc.lap_data) == 4
+        assert set(calc.lap_data["position"]) == {1}